@@ -237,10 +237,9 @@ def main():
             for idx, func_name in enumerate(all_functions, 1):
                 func_file = functions_dir / f"{func_name}.txt"
                 print(f"\n[文件输出] 生成函数报告 ({idx}/{len(all_functions)}): {func_name}", file=sys.stderr)
-                report = result.generate_single_function_report(func_name)
                 with open(func_file, 'w', encoding='utf-8') as f:
-                    f.write(report)
-                print(f"[文件输出] ✓ 写入文件: {func_file.name} ({len(report)} 字符)", file=sys.stderr)
+                    result.generate_single_function_report(func_name, out=f)
+                print(f"[文件输出] ✓ 写入文件: {func_file.name} ({func_file.stat().st_size} 字节)", file=sys.stderr)
 
             # 4. 生成调用链和数据结构报告（仅在多函数时）
             # 注意：单函数分析时，functions/ 已包含所有信息，无需额外文件
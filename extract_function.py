@@ -40,7 +40,8 @@ def extract_function_context(analysis_dir: str, function_name: str) -> str:
 
     # 提取源文件路径和行号
     target_file = data['target_file']
-    file_line = function_sig.split('//')[-1].strip()
+    sig_str = function_sig.partition('//')[0]
+    file_line = function_sig.rpartition('//')[2].strip()
     file_path, line_number = file_line.rsplit(':', 1)
     line_number = int(line_number)
 
@@ -54,7 +55,7 @@ def extract_function_context(analysis_dir: str, function_name: str) -> str:
     lines.append("## 1️⃣ 函数签名")
     lines.append("")
     lines.append(f"```cpp")
-    lines.append(function_sig.split('//')[0].strip())
+    lines.append(sig_str.strip())
     lines.append("```")
     lines.append("")
     lines.append(f"📍 位置：`{file_path}:{line_number}`")
@@ -143,7 +144,6 @@ def extract_function_context(analysis_dir: str, function_name: str) -> str:
     lines.append("")
 
     # 从函数签名中提取类型
-    sig_str = function_sig.split('//')[0]
     used_types = []
     for ds_name in data['data_structures'].keys():
         if ds_name in sig_str:
@@ -7,8 +7,15 @@ A Python-based static analysis tool for C++ projects that works without compilat
 __version__ = "1.1.0"
 __author__ = "SimpleAST Team"
 
-from .cpp_analyzer import CppProjectAnalyzer, AnalysisResult
-from .analysis_modes import AnalysisMode, get_mode_from_string
+from importlib import import_module
+
+# 公开接口按需导入：只使用子包（如 simple_ast.searchers）时不加载分析器和 tree-sitter
+_LAZY_EXPORTS = {
+    "CppProjectAnalyzer": ".cpp_analyzer",
+    "AnalysisResult": ".cpp_analyzer",
+    "AnalysisMode": ".analysis_modes",
+    "get_mode_from_string": ".analysis_modes",
+}
 
 __all__ = [
     "CppProjectAnalyzer",
@@ -16,3 +23,12 @@ __all__ = [
     "AnalysisMode",
     "get_mode_from_string",
 ]
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -4,7 +4,7 @@ Main C++ Project Analyzer - integrates all components.
 import json
 from pathlib import Path
 from typing import Dict, List, Optional, Set
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 
 from .project_indexer import ProjectIndexer
 from .entry_point_classifier import EntryPointClassifier, EntryPointInfo
@@ -32,6 +32,7 @@ class AnalysisResult:
     file_boundary: Optional[FileBoundary] = None  # 单文件边界信息（仅在 single_file_boundary 模式）
     branch_analyses: Dict[str, 'BranchAnalysis'] = None  # 函数分支分析结果（func_name -> BranchAnalysis）
     external_classifier: Optional['ExternalFunctionClassifier'] = None  # 外部函数分类器
+    _function_reporter: Optional['FunctionReporter'] = field(default=None, init=False, repr=False, compare=False)  # 复用的单函数报告器（跨报告共享提取缓存）
 
     def format_report(self) -> str:
         """Format the complete analysis as a readable report."""
@@ -577,15 +578,21 @@ class AnalysisResult:
 
         return "\n".join(lines)
 
-    def generate_single_function_report(self, func_name: str) -> str:
+    def generate_single_function_report(self, func_name: str, out=None) -> Optional[str]:
         """
         生成单个函数的完整测试上下文报告
 
         重构说明：委托给 FunctionReporter 实现，降低复杂度
+        同一个 AnalysisResult 复用一个 FunctionReporter，签名等提取缓存在多次报告间共享
+
+        Args:
+            func_name: 函数名
+            out: 输出流（可选），提供时报告直接写入该流并返回 None
         """
-        from .reporters import FunctionReporter
-        reporter = FunctionReporter(self)
-        return reporter.generate(func_name)
+        if self._function_reporter is None:
+            from .reporters import FunctionReporter
+            self._function_reporter = FunctionReporter(self)
+        return self._function_reporter.generate(func_name, out)
 
     # ==================== 以下方法已废弃，由 FunctionReporter 使用 ====================
     # 保留是为了向后兼容，如果直接调用这些内部方法
@@ -3,10 +3,32 @@ Tree-sitter based C++ parser wrapper.
 """
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
+import re
 from tree_sitter import Language, Parser, Node, Tree
 
 
+_CPP_LANGUAGE: Optional[Language] = None
+_QUERY_CACHE: Dict[str, object] = {}
+
+# String/char literals are matched first so comment markers inside them are kept
+_COMMENT_OR_LITERAL_RE = re.compile(
+    r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|//[^\n]*|/\*.*?\*/', re.S
+)
+
+
+def _get_language() -> Language:
+    """Load the tree-sitter C++ language once per process."""
+    global _CPP_LANGUAGE
+    if _CPP_LANGUAGE is None:
+        import tree_sitter_cpp
+
+        # Get C++ language pointer and create Language object
+        lang_ptr = tree_sitter_cpp.language()
+        _CPP_LANGUAGE = Language(lang_ptr, "cpp")
+    return _CPP_LANGUAGE
+
+
 class CppParser:
     """Wrapper for tree-sitter C++ parser."""
 
@@ -17,15 +39,9 @@ class CppParser:
     def _init_parser(self):
         """Initialize tree-sitter parser with C++ language."""
         try:
-            import tree_sitter_cpp
-
-            # Get C++ language pointer and create Language object
-            lang_ptr = tree_sitter_cpp.language()
-            CPP_LANGUAGE = Language(lang_ptr, "cpp")
-
             # Create parser and set language
             self.parser = Parser()
-            self.parser.set_language(CPP_LANGUAGE)
+            self.parser.set_language(_get_language())
 
         except Exception as e:
             raise RuntimeError(f"Failed to initialize C++ parser: {e}")
@@ -67,18 +83,49 @@ class CppParser:
     @staticmethod
     def get_node_text(node: Node, source_code: bytes) -> str:
         """Extract text content from a node."""
+        return CppParser.decode_text(source_code[node.start_byte:node.end_byte])
+
+    @staticmethod
+    def decode_text(raw: bytes) -> str:
+        """Decode a source slice, trying UTF-8 first and then common encodings."""
         # Try UTF-8 first, fall back to ignore/replace for other encodings
         try:
-            return source_code[node.start_byte:node.end_byte].decode('utf8')
+            return raw.decode('utf8')
         except UnicodeDecodeError:
             # Try common encodings
             for encoding in ['gbk', 'gb2312', 'latin-1']:
                 try:
-                    return source_code[node.start_byte:node.end_byte].decode(encoding)
+                    return raw.decode(encoding)
                 except (UnicodeDecodeError, LookupError):
                     continue
             # Last resort: decode with errors='replace'
-            return source_code[node.start_byte:node.end_byte].decode('utf8', errors='replace')
+            return raw.decode('utf8', errors='replace')
+
+    @staticmethod
+    def strip_comments(code: str) -> str:
+        """Replace comments with a single space, leaving string and char literals intact."""
+        return _COMMENT_OR_LITERAL_RE.sub(
+            lambda m: ' ' if m.group().startswith('/') else m.group(), code
+        )
+
+    @staticmethod
+    def find_declared_functions(header_content: str, func_names) -> list:
+        """
+        Find which of func_names are declared in a header.
+
+        Comments are stripped first, then a single alternation regex scans the text
+        once; a name must be preceded by line start/whitespace/'*'/'&' and followed by '(',
+        so 'Foo' does not match 'FooBar(' or 'pFoo('.
+
+        Returns:
+            Declared names in order of first occurrence
+        """
+        if not func_names:
+            return []
+        names = '|'.join(re.escape(name) for name in sorted(func_names, key=len, reverse=True))
+        decl_re = re.compile(rf'(?:^|[\s*&])({names})\s*\(', re.M)
+        code = CppParser.strip_comments(header_content)
+        return list(dict.fromkeys(match.group(1) for match in decl_re.finditer(code)))
 
     @staticmethod
     def find_nodes_by_type(node: Node, node_type: str) -> list:
@@ -102,6 +149,54 @@ class CppParser:
 
         return results
 
+    @staticmethod
+    def find_nodes_by_types(node: Node, node_types) -> Dict[str, list]:
+        """
+        Find all nodes of several types in a single traversal.
+
+        Args:
+            node: Root node to search from
+            node_types: Iterable of node types to collect (e.g., ('type_identifier', 'struct_specifier'))
+
+        Returns:
+            Dict mapping each requested node type to its matching nodes (in pre-order)
+        """
+        results = {node_type: [] for node_type in node_types}
+
+        # Pre-order walk with a TreeCursor, avoiding a children list per node
+        cursor = node.walk()
+        while True:
+            current = cursor.node
+            bucket = results.get(current.type)
+            if bucket is not None:
+                bucket.append(current)
+
+            if cursor.goto_first_child():
+                continue
+            while not cursor.goto_next_sibling():
+                if not cursor.goto_parent():
+                    return results
+
+    @staticmethod
+    def query(source: str):
+        """
+        Compile a tree-sitter query once and reuse it.
+
+        Query matching runs in native code, so collecting captures is much
+        cheaper than filtering nodes on the Python side.
+
+        Args:
+            source: Query source (S-expression patterns)
+
+        Returns:
+            Compiled tree-sitter Query object
+        """
+        compiled = _QUERY_CACHE.get(source)
+        if compiled is None:
+            compiled = _get_language().query(source)
+            _QUERY_CACHE[source] = compiled
+        return compiled
+
     @staticmethod
     def find_child_by_type(node: Node, child_type: str) -> Optional[Node]:
         """Find first direct child of a specific type."""
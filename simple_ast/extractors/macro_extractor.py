@@ -24,7 +24,8 @@ class MacroExtractor:
         """
         self.project_root = project_root
         self.grep_searcher = GrepSearcher(project_root=project_root)
-        self._macro_cache: Dict[str, str] = {}  # 缓存已查找的宏
+        self._macro_cache: Dict[str, Optional[str]] = {}  # 缓存已查找的宏（未找到也缓存为 None）
+        self._struct_macro_cache: Dict[str, Optional[str]] = {}  # 缓存结构体成员宏的展开结果
 
     def extract_macro_definition(self, macro_name: str, context_file: str = None) -> Optional[str]:
         """
@@ -62,6 +63,7 @@ class MacroExtractor:
 
             if not results:
                 logger.info(f"[宏展开] 未找到宏定义: {pure_macro_name}")
+                self._macro_cache[pure_macro_name] = None
                 return None
 
             # results 是 (file_path, line_num, content) 的列表
@@ -80,9 +82,9 @@ class MacroExtractor:
                 # 读取完整的多行宏定义
                 macro_def = self._read_multiline_macro(str(file_path), int(line_num))
 
-            # 缓存结果
+            # 缓存结果（包括未能提取的情况，避免重复搜索）
+            self._macro_cache[pure_macro_name] = macro_def
             if macro_def:
-                self._macro_cache[pure_macro_name] = macro_def
                 logger.info(f"[宏展开] ✓ {pure_macro_name}: 提取成功")
 
             return macro_def
@@ -179,6 +181,12 @@ class MacroExtractor:
         Returns:
             展开的成员定义（多行），如果未找到返回None
         """
+        if macro_name not in self._struct_macro_cache:
+            self._struct_macro_cache[macro_name] = self._expand_struct_macro(macro_name)
+        return self._struct_macro_cache[macro_name]
+
+    def _expand_struct_macro(self, macro_name: str) -> Optional[str]:
+        """提取并格式化结构体成员宏的展开定义（extract_struct_macro 的未缓存实现）"""
         macro_def = self.extract_macro_definition(macro_name)
 
         if not macro_def:
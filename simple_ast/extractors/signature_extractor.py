@@ -5,15 +5,56 @@
 """
 import re
 import sys
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from ..searchers import HeaderSearcher
 
+# 声明中紧跟 '(' 的标识符（与 _search 中 \bname\s*\( 的判定一致）
+_CALL_NAME_RE = re.compile(r'\b(\w+)\s*\(')
+_WORD_RE = re.compile(r'\w+')
+
 
 class SignatureExtractor:
     """函数签名提取器"""
 
     def __init__(self, header_searcher: Optional[HeaderSearcher] = None):
         self.header_searcher = header_searcher or HeaderSearcher()
+        # 签名缓存 {(函数名, 目标文件): 签名或 None}，未找到的结果同样缓存
+        self._cache: Dict[Tuple[str, str], Optional[str]] = {}
+        # 头文件签名索引 {目标文件: {函数名: 签名}}，由 prepare() 构建
+        self._index: Dict[str, Dict[str, str]] = {}
+
+    def prepare(self, target_file: str):
+        """
+        一次性扫描目标文件的候选头文件，建立 {函数名: 签名} 索引
+
+        之后对同一 target_file 的 extract() 直接查索引，不再逐个函数重读头文件
+
+        Args:
+            target_file: 目标文件路径
+        """
+        if target_file in self._index:
+            return
+
+        index: Dict[str, str] = {}
+        for header_file in self.header_searcher.find_headers(target_file):
+            try:
+                with open(header_file, 'r', encoding='utf-8', errors='ignore') as f:
+                    content = f.read()
+            except Exception:
+                continue
+
+            lines = content.split('\n')
+            for i, line in enumerate(lines):
+                if '(' not in line:
+                    continue
+
+                declaration = self._build_declaration(lines, i)
+                for name in _CALL_NAME_RE.findall(declaration):
+                    # 与 _search 一致：函数名须出现在声明首行，先出现者优先
+                    if name not in index and name in line:
+                        index[name] = declaration
+
+        self._index[target_file] = index
 
     def extract(self, func_name: str, target_file: str) -> Optional[str]:
         """
@@ -26,6 +67,17 @@ class SignatureExtractor:
         Returns:
             函数签名，未找到返回 None
         """
+        index = self._index.get(target_file)
+        if index is not None and _WORD_RE.fullmatch(func_name):
+            return index.get(func_name)
+
+        key = (func_name, target_file)
+        if key not in self._cache:
+            self._cache[key] = self._search(func_name, target_file)
+        return self._cache[key]
+
+    def _search(self, func_name: str, target_file: str) -> Optional[str]:
+        """在候选头文件中搜索函数签名（extract 的未缓存实现）"""
         possible_headers = self.header_searcher.find_headers(target_file)
 
         for header_file in possible_headers:
@@ -38,18 +90,7 @@ class SignatureExtractor:
                 for i, line in enumerate(lines):
                     if func_name in line and '(' in line:
                         # 可能是函数声明
-                        declaration = line.strip()
-
-                        # 如果没有分号且没有花括号，可能跨行
-                        if ';' not in declaration and '{' not in declaration and i + 1 < len(lines):
-                            for next_line in lines[i+1:i+5]:
-                                declaration += ' ' + next_line.strip()
-                                if ';' in next_line or '{' in next_line:
-                                    break
-
-                        # 清理
-                        declaration = declaration.split(';')[0].strip()
-                        declaration = declaration.split('{')[0].strip()
+                        declaration = self._build_declaration(lines, i)
 
                         # 验证是否真的是目标函数
                         if re.search(rf'\b{re.escape(func_name)}\s*\(', declaration):
@@ -59,3 +100,20 @@ class SignatureExtractor:
                 continue
 
         return None
+
+    @staticmethod
+    def _build_declaration(lines, i: int) -> str:
+        """从第 i 行开始拼接声明（支持跨行），截断到分号或花括号之前"""
+        declaration = lines[i].strip()
+
+        # 如果没有分号且没有花括号，可能跨行
+        if ';' not in declaration and '{' not in declaration and i + 1 < len(lines):
+            for next_line in lines[i+1:i+5]:
+                declaration += ' ' + next_line.strip()
+                if ';' in next_line or '{' in next_line:
+                    break
+
+        # 清理
+        declaration = declaration.split(';')[0].strip()
+        declaration = declaration.split('{')[0].strip()
+        return declaration
@@ -7,7 +7,7 @@
 """
 import re
 import sys
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
 
 
@@ -20,6 +20,8 @@ class StructureExtractor:
             project_root: 项目根目录，用于全局搜索
         """
         self.project_root = project_root
+        # 定义缓存 {(数据结构名, 目标文件): 定义或 None}，未找到的结果同样缓存
+        self._cache: Dict[Tuple[str, str], Optional[str]] = {}
 
     def extract(self, struct_name: str, target_file: str) -> Optional[str]:
         """
@@ -36,6 +38,34 @@ class StructureExtractor:
         Returns:
             数据结构定义，未找到返回 None
         """
+        return self.extract_many([struct_name], target_file)[struct_name]
+
+    def extract_many(self, struct_names: Iterable[str], target_file: str) -> Dict[str, Optional[str]]:
+        """
+        批量提取多个外部数据结构的定义
+
+        与逐个调用 extract() 相比：StructureSearcher 只创建一次，
+        降级路径中每个候选头文件只读取一次，所有结构体在同一份内容上查找。
+
+        Args:
+            struct_names: 数据结构名称列表
+            target_file: 目标文件路径（用于推断项目根目录）
+
+        Returns:
+            {数据结构名称: 定义或 None}
+        """
+        names = list(dict.fromkeys(struct_names))
+        missing = [name for name in names if (name, target_file) not in self._cache]
+        if missing:
+            for name, definition in self._search_many(missing, target_file).items():
+                self._cache[(name, target_file)] = definition
+
+        return {name: self._cache[(name, target_file)] for name in names}
+
+    def _search_many(self, struct_names: List[str], target_file: str) -> Dict[str, Optional[str]]:
+        """批量搜索数据结构定义（extract_many 的未缓存实现）"""
+        results: Dict[str, Optional[str]] = {name: None for name in struct_names}
+
         # 推断项目根目录
         if not self.project_root:
             # 从 target_file 向上查找，找到包含 .git 或合理的项目根
@@ -51,13 +81,20 @@ class StructureExtractor:
             from ..searchers import StructureSearcher
 
             searcher = StructureSearcher(self.project_root)
-            result = searcher.search(struct_name)
-            if result:
-                return result
+            if len(struct_names) > 1:
+                # 多个结构体合并为每个优先级一次 grep
+                results.update(searcher.search_many(struct_names))
+            else:
+                for name in results:
+                    results[name] = searcher.search(name)
         except Exception as e:
             # 如果全局搜索失败，降级到旧方法
             pass
 
+        remaining = [name for name, definition in results.items() if not definition]
+        if not remaining:
+            return results
+
         # 降级：使用 HeaderSearcher 路径搜索（保持兼容性）
         try:
             from ..searchers import HeaderSearcher
@@ -72,16 +109,20 @@ class StructureExtractor:
 
                     # 使用绝对路径
                     abs_path = str(header_file.resolve()) if hasattr(header_file, 'resolve') else str(header_file)
-                    definition = self._search_struct_by_text(content, struct_name, abs_path)
-                    if definition:
-                        return definition
+                    for name in remaining:
+                        if results[name] or name not in content:
+                            continue
+                        results[name] = self._search_struct_by_text(content, name, abs_path)
+
+                    if all(results[name] for name in remaining):
+                        break
 
                 except Exception:
                     continue
         except Exception:
             pass
 
-        return None
+        return results
 
     def _search_struct_by_text(self, content: str, struct_name: str, filename: str) -> Optional[str]:
         """用文本搜索查找数据结构定义"""
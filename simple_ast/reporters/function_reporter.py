@@ -12,18 +12,102 @@
 - 提取类型转换关系
 - 格式化输出
 """
+import io
+import logging
+import re
 import sys
-from typing import Dict, List, Set, Optional
+from typing import Dict, List, Set, Optional, TextIO
 from ..extractors import ConstantExtractor, SignatureExtractor, StructureExtractor, MacroExtractor, GlobalVariableExtractor, TypeCastExtractor, FunctionImplExtractor
 from ..searchers import HeaderSearcher
+from ..cpp_parser import CppParser
 from ..logger import get_logger
 logger = get_logger()
 
+# 结构体定义中独立成行的宏（全大写+下划线），可带行尾注释
+# 匹配类似 "    VOS_MSG_HEADER" 或 "    VOS_MSG_HEADER  /* comment */"
+_STRUCT_MACRO_RE = re.compile(r'^(?P<indent>\s*)(?P<macro>[A-Z][A-Z0-9_]+)\s*(?P<comment>/\*.*\*/)?\s*$')
+
+# 过滤项目基础类型（VOS_*/DIAM_* 前缀），使用 fullmatch 整体匹配
+_BASIC_TYPE_RE = re.compile(
+    r'VOS_(?:VOID|INT|UINT|CHAR|BOOL|LONG|SHORT|DWORD|WORD|BYTE)\d*'
+    r'|DIAM_(?:VOID|INT|UINT|CHAR|BOOL|UINT32|INT32)\d*'
+)
+
+# 标识符（用于把签名切分为标识符集合，避免 Foo 误匹配 FooBar）
+_IDENT_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+# 签名中的类型名：参数类型（类型名 + 指针/引用/空格）或成员函数的类名（类名 + ::），一次扫描
+_SIG_TYPE_RE = re.compile(r'\b([A-Z][a-zA-Z0-9_]*)(?:\s*[\*&\s]|::)')
+
+# 函数体类型提取查询：所有 type_identifier，以及 struct/class 说明符的名称
+_BODY_TYPES_QUERY = '(type_identifier) @type (struct_specifier name: (_) @type)'
+
+
+class _LineJoinWriter:
+    """
+    按 "\n".join(lines) 的格式写出报告
+
+    各章节按 "行 + \n" 写入，最后一个换行符延后到下一次写入时才输出，
+    报告结束时丢弃，保证与原先拼接行列表的输出逐字节一致（末尾无换行）
+    """
+    __slots__ = ('_out', '_pending')
+
+    def __init__(self, out: TextIO):
+        self._out = out
+        self._pending = False
+
+    def write(self, text: str):
+        if not text:
+            return
+        if self._pending:
+            self._out.write('\n')
+        self._pending = text.endswith('\n')
+        self._out.write(text[:-1] if self._pending else text)
+
+
+# 数据结构提取时需要过滤的关键字和基础类型
+_KEYWORDS = frozenset({'VOID', 'INT', 'CHAR', 'BOOL', 'FLOAT', 'DOUBLE', 'LONG', 'SHORT',
+                       'CONST', 'STATIC', 'INLINE', 'VIRTUAL', 'EXPLICIT', 'TYPEDEF',
+                       'UNSIGNED', 'SIGNED'})
+_BASIC_TYPEDEFS = frozenset({'UINT8', 'UINT16', 'UINT32', 'UINT64',
+                             'INT8', 'INT16', 'INT32', 'INT64',
+                             'DWORD', 'WORD', 'BYTE', 'SIZE_T'})
+
+# 常见的宏/修饰符
+_COMMON_MACROS = frozenset({'IN', 'OUT', 'INOUT', 'IO', 'OPTIONAL', 'CONST'})
+
+# 按大写形式过滤的关键字和基础typedef
+_FILTER_WORDS = _KEYWORDS | _BASIC_TYPEDEFS
+
+# 外部类型过滤：常见宏、参数名模式、项目基础类型合并为一个正则，每个类型名只匹配一次
+# 命名分组用于日志中说明过滤原因
+_TYPE_FILTER_RE = re.compile(
+    rf'(?P<macro>(?:{"|".join(sorted(_COMMON_MACROS))})\Z)'
+    # pMsg/psLocalAddr/pucData/pulDataLength/phTimerGrp - 指针/句柄参数命名习惯
+    # PTDiamOsAllocMsg - 函数指针类型前缀
+    r'|(?P<param>p[A-Z]|ps[A-Z]|puc[A-Z]|pul[A-Z]|ph[A-Z]|PT[A-Z])'
+    rf'|(?P<basic>(?:{_BASIC_TYPE_RE.pattern})\Z)'
+)
+_TYPE_FILTER_REASONS = {'macro': '宏定义', 'param': '参数名', 'basic': '项目基础类型'}
+
+# dict.get 的缺省标记（区分“键不存在”和“值为 None”）
+_MISSING = object()
 
 
 class FunctionReporter:
     """单函数报告生成器 - 简单实用，不过度设计"""
 
+    __slots__ = (
+        'result', 'config',
+        'constant_extractor', 'signature_extractor', 'structure_extractor',
+        'macro_extractor', 'global_var_extractor', 'type_cast_extractor', 'impl_extractor',
+        '_signatures', '_call_chains', '_data_structures', '_branch_analyses',
+        '_valid_ds', '_basic_ds',
+        '_file_functions', '_file_data_structures',
+        '_direct_deps_cache', '_classified_externals', '_business_deps_cache', '_ds_cache',
+        'function_exposure_map',
+    )
+
     def __init__(self, result, config=None):
         """
         Args:
@@ -33,6 +117,16 @@ class FunctionReporter:
         self.result = result
         self.config = config or {}
 
+        # 递归展开中频繁访问的结果字段，一次性解析
+        self._signatures: dict = result.function_signatures
+        self._call_chains: dict = result.call_chains
+        self._data_structures: dict = result.data_structures
+        # 文件内部数据结构预分类：{名称: 信息}（非基础类型）与基础类型名称集合（首次使用时构建）
+        self._valid_ds: Optional[dict] = None
+        self._basic_ds: Set[str] = set()
+        branch_analyses = getattr(result, 'branch_analyses', None)
+        self._branch_analyses: dict = branch_analyses if branch_analyses is not None else {}
+
         # 使用 AnalysisResult 中的项目根目录
         project_root = result.project_root if hasattr(result, 'project_root') else "."
 
@@ -60,6 +154,20 @@ class FunctionReporter:
         # FunctionImplExtractor 用于函数实现提取
         self.impl_extractor = FunctionImplExtractor(project_root=project_root)
 
+        # 一次性解析 file_boundary 中的函数/数据结构表，避免每次访问都做 hasattr 探测
+        file_boundary = getattr(result, 'file_boundary', None)
+        self._file_functions: dict = getattr(file_boundary, 'file_functions', None) or {}
+        self._file_data_structures: dict = getattr(file_boundary, 'file_data_structures', None) or {}
+
+        # 调用树直接依赖分类缓存 {函数名: (内部依赖列表, 外部依赖集合)}
+        self._direct_deps_cache: Dict[str, tuple] = {}
+        # 调用链中全部外部函数的分类结果 {分类: 函数名集合}（首次生成报告时计算）
+        self._classified_externals: Optional[Dict[str, Set[str]]] = None
+        # 函数的业务外部依赖（已排序）缓存 {函数名: 排序后的业务函数列表}
+        self._business_deps_cache: Dict[str, List[str]] = {}
+        # 单函数数据结构提取结果缓存 {函数名: {数据结构名: 信息}}
+        self._ds_cache: Dict[str, dict] = {}
+
         # 构建函数暴露状态映射 {函数名: (category, declaration_location)}
         # 使用 file_boundary 中的所有函数信息，而不只是 entry_points（可能被过滤）
         self.function_exposure_map = {}
@@ -77,8 +185,7 @@ class FunctionReporter:
                 self.function_exposure_map[ep.name] = (ep.category, ep.declaration_location)
 
         # 如果 file_boundary 中有更多函数信息，补充到映射中
-        if (hasattr(self.result, 'file_boundary') and self.result.file_boundary and
-            hasattr(self.result.file_boundary, 'file_functions') and self.result.file_boundary.file_functions):
+        if self._file_functions:
 
             from pathlib import Path
 
@@ -87,7 +194,7 @@ class FunctionReporter:
             header_functions = self._find_header_declarations(str(target_file_path))
 
             # 为每个函数分类
-            for func_name, func_info in self.result.file_boundary.file_functions.items():
+            for func_name, func_info in self._file_functions.items():
                 # 如果已经在映射中，跳过
                 if func_name in self.function_exposure_map:
                     continue
@@ -106,12 +213,14 @@ class FunctionReporter:
                     decl_location = ""
 
                 self.function_exposure_map[func_name] = (category, decl_location)
-                logger.info(f"[暴露状态映射] {func_name}: {category}")
+                logger.info("[暴露状态映射] %s: %s", func_name, category)
 
     def _find_header_declarations(self, cpp_file_path: str) -> dict:
         """
         查找cpp文件对应的头文件中的函数声明
-        使用简单的文本搜索
+
+        先去掉注释，再用一个包含所有函数名的正则一次扫描整个头文件，
+        要求函数名前是行首/空白/*/&、后面紧跟 '('，避免注释和子串误匹配
         """
         from pathlib import Path
 
@@ -127,10 +236,7 @@ class FunctionReporter:
         ]
 
         # 获取要搜索的函数列表
-        search_functions = set()
-        if (hasattr(self.result, 'file_boundary') and self.result.file_boundary and
-            hasattr(self.result.file_boundary, 'file_functions')):
-            search_functions = set(self.result.file_boundary.file_functions.keys())
+        search_functions = set(self._file_functions)
 
         for header_path in possible_headers:
             if header_path.exists():
@@ -138,44 +244,46 @@ class FunctionReporter:
                     with open(header_path, 'r', encoding='utf-8', errors='ignore') as f:
                         header_content = f.read()
 
-                    # 简单的文本搜索
-                    for func_name in search_functions:
-                        if func_name in header_content:
-                            for line in header_content.split('\n'):
-                                # 跳过注释行
-                                if line.strip().startswith('//') or line.strip().startswith('/*'):
-                                    continue
-
-                                # 检查行是否包含函数名且看起来像声明
-                                if func_name in line and '(' in line:
-                                    header_funcs[func_name] = str(header_path)
-                                    logger.info(f"[头文件检测] 发现 {func_name} 在 {header_path.name}")
-                                    break
+                    # 去掉注释后一次扫描所有函数名
+                    for func_name in CppParser.find_declared_functions(header_content, search_functions):
+                        header_funcs[func_name] = str(header_path)
+                        logger.info("[头文件检测] 发现 %s 在 %s", func_name, header_path.name)
 
                     if header_funcs:
-                        logger.info(f"[头文件检测] 在 {header_path.name} 中找到 {len(header_funcs)} 个函数声明")
+                        logger.info("[头文件检测] 在 %s 中找到 %d 个函数声明", header_path.name, len(header_funcs))
                     break
                 except Exception as e:
-                    logger.debug(f"[头文件检测] 读取 {header_path} 失败: {e}")
+                    logger.debug("[头文件检测] 读取 %s 失败: %s", header_path, e)
                     continue
 
         return header_funcs
 
-    def generate(self, func_name: str) -> str:
+    def generate(self, func_name: str, out: Optional[TextIO] = None) -> Optional[str]:
         """
         生成单个函数的完整测试上下文报告
 
+        报告逐行写入 out，而不是先在内存中拼接完整的行列表
+
         Args:
             func_name: 函数名
+            out: 输出流（可选），如文件对象；未提供时写入内部 StringIO
 
         Returns:
-            格式化的报告文本
+            未提供 out 时返回格式化的报告文本，否则返回 None
         """
-        lines = []
+        sink = out if out is not None else io.StringIO()
+        buf = _LineJoinWriter(sink)
+        write = buf.write
         visited = set()
         all_data_structures = set()
         all_external_funcs = set()
 
+        # 一次性分类调用链中的所有外部函数，递归展开时只做集合求交
+        if self._classified_externals is None:
+            self._classified_externals = self._classify_all_externals()
+        # 一次性索引候选头文件中的函数签名，Mock 清单中直接查表
+        self.signature_extractor.prepare(self.result.target_file)
+
         # === 提取并展示函数实现（放在最前面） ===
         func_impl = self.impl_extractor.extract(
             func_name,
@@ -184,20 +292,13 @@ class FunctionReporter:
         )
 
         if func_impl:
-            lines.append("=" * 80)
-            lines.append(f"[函数实现] {func_name}")
-            lines.append("=" * 80)
-            lines.append(func_impl)
-            lines.append("")
-            lines.append("=" * 80)
-            lines.append("[分析信息]")
-            lines.append("=" * 80)
+            self._write_impl_section(buf, func_name, func_impl)
         else:
-            logger.warning(f"[函数实现] 未能提取 {func_name} 的实现代码")
+            logger.warning("[函数实现] 未能提取 %s 的实现代码", func_name)
 
-        # 递归生成主函数及其所有内部依赖
+        # 生成主函数及其所有内部依赖
         self._generate_recursive_function_info(
-            func_name, lines, "", visited, all_data_structures, all_external_funcs
+            func_name, buf, visited, all_data_structures, all_external_funcs
         )
 
         # 提取并展示常量/宏定义
@@ -227,13 +328,13 @@ class FunctionReporter:
             for const_name in constants.keys():
                 if const_name in global_vars:
                     del global_vars[const_name]
-                    logger.info(f"[全局变量] 过滤常量: {const_name}")
+                    logger.info("[全局变量] 过滤常量: %s", const_name)
 
         if constants:
-            lines.append("\n[常量定义]")
+            write("\n[常量定义]\n")
             for const_name, const_def in sorted(constants.items()):
                 if const_def:
-                    lines.append(f"{const_name}: {const_def}")
+                    write(f"{const_name}: {const_def}\n")
 
                     # 如果是函数宏（包含括号），尝试展开完整定义
                     if '(' in const_name or self.macro_extractor.is_likely_macro(const_name):
@@ -245,50 +346,56 @@ class FunctionReporter:
                             # 只有当展开内容显著更长时才显示（避免重复）
                             # 多行宏需要格式化
                             if '\n' in macro_expansion:
-                                lines.append(f"  /* 宏展开: */")
+                                write(f"  /* 宏展开: */\n")
                                 for line in macro_expansion.split('\n'):
-                                    lines.append(f"  {line}")
+                                    write(f"  {line}\n")
                             else:
-                                lines.append(f"  /* 宏展开: {macro_expansion} */")
-                            logger.info(f"[宏展开输出] {const_name}: 已展开")
+                                write(f"  /* 宏展开: {macro_expansion} */\n")
+                            logger.info("[宏展开输出] %s: 已展开", const_name)
 
         # 统一展示数据结构定义章节
         if all_data_structures:
-            lines.append("\n[数据结构]")
+            write("\n[数据结构]\n")
 
-            # 分类：内部定义 vs 外部引用
-            internal_ds = [ds for ds in all_data_structures if ds in self.result.data_structures]
-            external_ds = [ds for ds in all_data_structures if ds not in self.result.data_structures]
+            # 分类：内部定义 vs 外部引用（一次遍历）
+            internal_ds, external_ds = [], []
+            known_ds = self._data_structures
+            for ds in all_data_structures:
+                (internal_ds if ds in known_ds else external_ds).append(ds)
+            internal_ds.sort()
+            external_ds.sort()
 
             # 显示内部定义的数据结构（有完整代码）
             if internal_ds:
-                for ds in sorted(internal_ds):
-                    if (self.result.file_boundary and
-                        hasattr(self.result.file_boundary, 'file_data_structures') and
-                        ds in self.result.file_boundary.file_data_structures):
-                        ds_info = self.result.file_boundary.file_data_structures[ds]
-                        lines.append(f"\n{ds} ({ds_info['type']}, 内部 {self.result.target_file}:{ds_info['line']}):")
+                file_data_structures = self._file_data_structures
+                for ds in internal_ds:
+                    ds_info = file_data_structures.get(ds)
+                    if ds_info is not None:
+                        write(f"\n{ds} ({ds_info['type']}, 内部 {self.result.target_file}:{ds_info['line']}):\n")
 
                         # 展开定义中的宏
                         definition = self._expand_macros_in_definition(ds_info['definition'])
-                        lines.append(definition)
+                        write(f"{definition}\n")
                     else:
-                        lines.append(f"\n{ds} (内部)")
+                        write(f"\n{ds} (内部)\n")
 
             # 尝试从头文件读取外部数据结构
             if external_ds:
-                for ds in sorted(external_ds):
-                    definition = self.structure_extractor.extract(ds, self.result.target_file)
+                # 批量提取外部数据结构（提取器内部缓存，重复类型不再重复搜索）
+                definitions = self.structure_extractor.extract_many(external_ds, self.result.target_file)
+
+                for ds in external_ds:
+                    definition = definitions[ds]
                     if definition:
-                        lines.append(f"\n{ds} (外部):")
+                        write(f"\n{ds} (外部):\n")
 
                         # 展开定义中的宏
                         definition = self._expand_macros_in_definition(definition)
-                        lines.append(definition)
+                        write(f"{definition}\n")
 
         # 显示类型转换关系（如果有）
         if type_casts and type_casts.get('casts'):
-            lines.append("\n[类型转换关系]")
+            write("\n[类型转换关系]\n")
 
             # 按源变量分组
             source_groups = {}
@@ -299,7 +406,7 @@ class FunctionReporter:
                 source_groups[source].append(cast)
 
             for source_var, casts in sorted(source_groups.items()):
-                lines.append(f"  {source_var} 的转换:")
+                write(f"  {source_var} 的转换:\n")
                 for cast in casts:
                     target = cast['target_var']
                     target_type = cast['target_type']
@@ -313,19 +420,28 @@ class FunctionReporter:
                             fields_str = ', '.join(usage['fields'])
                             usage_info = f" → 访问字段: {fields_str}"
 
-                    lines.append(f"    → {target} ({target_type}*) [行{line_num}]{usage_info}")
+                    write(f"    → {target} ({target_type}*) [行{line_num}]{usage_info}\n")
 
         # 显示全局变量（如果有）
         if global_vars:
-            lines.append("\n[全局变量]")
+            write("\n[全局变量]\n")
             for var_name in sorted(global_vars.keys()):
                 info = global_vars[var_name]
-                lines.append(f"  {var_name}:")
-                lines.append(f"    类型: {info['type']}")
-                lines.append(f"    定义: {info['definition']}")
-                lines.append(f"    位置: {info['file']}:{info['line']}")
-
-        return "\n".join(lines)
+                write(f"  {var_name}:\n")
+                write(f"    类型: {info['type']}\n")
+                write(f"    定义: {info['definition']}\n")
+                write(f"    位置: {info['file']}:{info['line']}\n")
+
+        if out is None:
+            return sink.getvalue()
+        return None
+
+    @staticmethod
+    def _write_impl_section(out: TextIO, func_name: str, func_impl: str):
+        """写入函数实现章节（实现代码 + 分析信息标题）"""
+        separator = "=" * 80
+        out.write(f"{separator}\n[函数实现] {func_name}\n{separator}\n{func_impl}\n\n"
+                  f"{separator}\n[分析信息]\n{separator}\n")
 
     def _get_exposure_info(self, func_name: str) -> str:
         """
@@ -357,20 +473,50 @@ class FunctionReporter:
 
         return ""
 
-    def _generate_recursive_function_info(self, func_name: str, lines: List[str],
-                                         number_prefix: str, visited: Set[str],
+    def _generate_recursive_function_info(self, func_name: str, out: TextIO,
+                                         visited: Set[str],
                                          all_data_structures: Set[str],
                                          all_external_funcs: Set[str]):
-        """递归生成函数信息（带序号层级）"""
-        # 防止循环依赖
-        if func_name in visited:
-            logger.info(f"[递归展开] 跳过已访问函数: {func_name}")
-            return
-        visited.add(func_name)
+        """
+        展开函数及其内部依赖（带序号层级），逐行写入 out
+
+        使用显式栈按先序深度优先遍历，输出顺序与递归展开一致，
+        调用链很深时也不会触发 RecursionError
+        """
+        stack = [(func_name, "", 0)]
+        while stack:
+            current, number_prefix, depth = stack.pop()
+
+            # 防止循环依赖
+            if current in visited:
+                logger.info("[递归展开] 跳过已访问函数: %s", current)
+                continue
+            visited.add(current)
+
+            internal_deps = self._generate_function_info(
+                current, out, number_prefix, depth, all_data_structures, all_external_funcs
+            )
+
+            # 逆序入栈，保证按调用顺序展开
+            child_depth = depth + 1
+            for idx in range(len(internal_deps), 0, -1):
+                new_prefix = f"{number_prefix}.{idx}" if number_prefix else f"{idx}"
+                stack.append((internal_deps[idx - 1], new_prefix, child_depth))
+
+    def _generate_function_info(self, func_name: str, out: TextIO,
+                                number_prefix: str, depth: int,
+                                all_data_structures: Set[str],
+                                all_external_funcs: Set[str]) -> List[str]:
+        """
+        生成单个函数的信息（带序号层级），逐行写入 out
+
+        Returns:
+            需要继续展开的内部依赖函数列表
+        """
+        write = out.write
 
-        depth = len(number_prefix.split('.')) if number_prefix else 0
         indent = "  " * depth
-        logger.info(f"{indent}[递归展开] 处理函数: {func_name} (层级: {number_prefix or '主函数'})")
+        logger.info("%s[递归展开] 处理函数: %s (层级: %s)", indent, func_name, number_prefix or '主函数')
 
         # === 1. 提取函数实现（对于内部依赖函数） ===
         is_internal_dep = bool(number_prefix)
@@ -381,46 +527,39 @@ class FunctionReporter:
                 self.result.file_boundary
             )
             if func_impl:
-                lines.append("")
-                lines.append("=" * 80)
-                lines.append(f"[函数实现] {func_name}")
-                lines.append("=" * 80)
-                lines.append(func_impl)
-                lines.append("")
-                lines.append("=" * 80)
-                lines.append("[分析信息]")
-                lines.append("=" * 80)
+                write("\n")
+                self._write_impl_section(out, func_name, func_impl)
 
         # === 2. 函数签名 ===
         if number_prefix:
             # 内部依赖函数：添加 [内部] 标记
-            lines.append(f"\n{number_prefix} {func_name} [内部]")
+            write(f"\n{number_prefix} {func_name} [内部]\n")
         else:
             # 主函数
-            lines.append(f"函数: {func_name}")
-
-        if func_name in self.result.function_signatures:
-            sig = self.result.function_signatures[func_name]
-            sig_part = sig.split('//')[0].strip()
-            if '//' in sig:
-                location = sig.split('//')[-1].strip()
-                lines.append(f"{sig_part} // {location}")
+            write(f"函数: {func_name}\n")
+
+        sig = self._signatures.get(func_name)
+        if sig is not None:
+            head, sep, tail = sig.partition('//')
+            sig_part = head.strip()
+            if sep:
+                location = tail.rpartition('//')[2].strip()
+                write(f"{sig_part} // {location}\n")
             else:
-                lines.append(sig_part)
+                write(f"{sig_part}\n")
 
         # === 3. 显示函数暴露状态 ===
         exposure_info = self._get_exposure_info(func_name)
         if exposure_info:
-            lines.append(exposure_info)
+            write(f"{exposure_info}\n")
 
         # === 4. 分支复杂度分析（仅当圈复杂度>5时） ===
-        if (hasattr(self.result, 'branch_analyses') and self.result.branch_analyses and
-            func_name in self.result.branch_analyses):
-            branch_analysis = self.result.branch_analyses[func_name]
+        branch_analysis = self._branch_analyses.get(func_name)
+        if branch_analysis is not None:
             if branch_analysis.cyclomatic_complexity > 5:
-                lines.append(f"圈复杂度: {branch_analysis.cyclomatic_complexity}")
+                write(f"圈复杂度: {branch_analysis.cyclomatic_complexity}\n")
                 if branch_analysis.conditions:
-                    lines.append("关键分支:")
+                    write("关键分支:\n")
 
                     # 优先显示switch（包含case信息），然后显示if
                     switch_conditions = [c for c in branch_analysis.conditions if c.branch_type == 'switch']
@@ -429,71 +568,63 @@ class FunctionReporter:
                     display_conditions = switch_conditions + other_conditions
 
                     for idx, cond in enumerate(display_conditions, 1):
-                        lines.append(f"  {idx}. {cond.condition}")
+                        write(f"  {idx}. {cond.condition}\n")
                         # 对于switch，显示case值和详细信息
                         if cond.branch_type == 'switch' and cond.suggestions:
                             for sug in cond.suggestions:
-                                lines.append(f"     {sug}")
+                                write(f"     {sug}\n")
 
                             # 显示每个 case 的详细信息
                             if hasattr(cond, 'switch_cases') and cond.switch_cases:
-                                lines.append("     详细分支:")
+                                write("     详细分支:\n")
                                 for case_info in cond.switch_cases:
-                                    lines.append(f"       case {case_info.case_value}:")
+                                    write(f"       case {case_info.case_value}:\n")
                                     if case_info.called_functions:
                                         func_list = ', '.join(case_info.called_functions)
-                                        lines.append(f"         调用: {func_list}")
-                                    lines.append(f"         位置: 行{case_info.line_start}-{case_info.line_end}")
+                                        write(f"         调用: {func_list}\n")
+                                    write(f"         位置: 行{case_info.line_start}-{case_info.line_end}\n")
 
         # === 5. 收集直接依赖 ===
-        direct_internal_deps = []
-        direct_external_deps = set()
-
-        if func_name in self.result.call_chains:
-            call_tree = self.result.call_chains[func_name]
-            if call_tree and call_tree.children:
-                logger.info(f"{indent}[递归展开]   找到 {len(call_tree.children)} 个直接调用")
-                for child in call_tree.children:
-                    if child.is_external:
-                        direct_external_deps.add(child.function_name)
-                        all_external_funcs.add(child.function_name)
-                    else:
-                        direct_internal_deps.append(child.function_name)
-
-                internal_count = len(direct_internal_deps)
-                external_count = len(direct_external_deps)
-                logger.info(f"{indent}[递归展开]   分类: 内部{internal_count}个, 外部{external_count}个")
-            else:
-                logger.info(f"{indent}[递归展开]   无直接调用")
-        else:
-            logger.info(f"{indent}[递归展开]   警告: 未找到调用链信息")
+        direct_internal_deps, direct_external_deps = self._get_direct_deps(func_name, indent)
+        all_external_funcs.update(direct_external_deps)
 
         # === 6. Mock清单（仅显示业务外部依赖，并搜索签名） ===
         if direct_external_deps:
-            # 使用分类器分类外部函数
-            classified = self.result.external_classifier.classify(direct_external_deps)
-
-            print(f"{indent}[Mock生成] 外部函数分类: 业务{len(classified.get('business', []))}个, "
-                  f"宏{len(classified.get('macros', []))}个, "
-                  f"标准库{len(classified.get('standard_library', []))}个, "
-                  f"日志{len(classified.get('logging_utility', []))}个", file=sys.stderr)
+            # 按预先计算的全量分类结果求交，业务依赖排序后按函数名缓存（跨报告复用）
+            business_deps = self._business_deps_cache.get(func_name)
+            if business_deps is None:
+                business_deps = sorted(direct_external_deps & self._classified_externals['business'])
+                self._business_deps_cache[func_name] = business_deps
+
+            # 分类统计需要额外求交，仅在 DEBUG 级别开启时计算
+            if logger.isEnabledFor(logging.DEBUG):
+                classified = {
+                    category: direct_external_deps & funcs
+                    for category, funcs in self._classified_externals.items()
+                }
+                logger.debug("%s[Mock生成] 外部函数分类: 业务%d个, 宏%d个, 标准库%d个, 日志%d个",
+                             indent,
+                             len(classified.get('business', [])),
+                             len(classified.get('macros', [])),
+                             len(classified.get('standard_library', [])),
+                             len(classified.get('logging_utility', [])))
 
             # 仅显示业务外部依赖（隐藏标准库、日志函数和宏定义）
-            if classified['business']:
-                lines.append("Mock: (外部函数,需要Mock)")
-                for func in sorted(classified['business']):
+            if business_deps:
+                write("Mock: (外部函数,需要Mock)\n")
+                for func in business_deps:
                     # 尝试搜索函数签名
                     signature = self.signature_extractor.extract(func, self.result.target_file)
                     if signature:
-                        lines.append(f"  {func} [外部]: {signature}")
-                        logger.info(f"{indent}[Mock生成]   ✓ {func}: 找到签名")
+                        write(f"  {func} [外部]: {signature}\n")
+                        logger.info("%s[Mock生成]   ✓ %s: 找到签名", indent, func)
                     else:
-                        lines.append(f"  {func} [外部]")
-                        logger.info(f"{indent}[Mock生成]   ✗ {func}: 未找到签名")
+                        write(f"  {func} [外部]\n")
+                        logger.info("%s[Mock生成]   ✗ %s: 未找到签名", indent, func)
             else:
-                logger.info(f"{indent}[Mock生成] 无业务外部依赖（已过滤宏、标准库和日志）")
+                logger.info("%s[Mock生成] 无业务外部依赖（已过滤宏、标准库和日志）", indent)
         else:
-            logger.info(f"{indent}[Mock生成] 无外部依赖")
+            logger.info("%s[Mock生成] 无外部依赖", indent)
 
         # === 7. 数据结构 - 只列出名称，收集到 all_data_structures ===
         used_data_structures = self._extract_data_structures_from_single_function(func_name)
@@ -501,163 +632,166 @@ class FunctionReporter:
         if used_data_structures:
             # 添加到全局收集set
             all_data_structures.update(used_data_structures.keys())
-            # 只列出名称
-            lines.append(f"数据结构: {', '.join(sorted(used_data_structures.keys()))}")
-
-        # === 8. 递归显示内部依赖函数 ===
-        if direct_internal_deps:
-            # 仅在主函数时添加章节标题
-            if not number_prefix:
-                lines.append("\n[内部依赖函数] (同文件定义,不需要Mock)")
-
-            for idx, dep_func in enumerate(direct_internal_deps, start=1):
-                # 生成序号前缀
-                if number_prefix:
-                    new_prefix = f"{number_prefix}.{idx}"
-                else:
-                    new_prefix = f"{idx}"
+            # 只列出名称（缓存结果已按名称排序）
+            write(f"数据结构: {', '.join(used_data_structures)}\n")
+
+        # === 8. 内部依赖函数（由调用方继续展开） ===
+        # 仅在主函数时添加章节标题
+        if direct_internal_deps and not number_prefix:
+            write("\n[内部依赖函数] (同文件定义,不需要Mock)\n")
+
+        return direct_internal_deps
+
+    def _classify_all_externals(self) -> Dict[str, Set[str]]:
+        """
+        扫描全部调用链的直接调用收集外部函数，并只调用一次分类器
 
-                # 递归生成依赖函数的完整信息
-                self._generate_recursive_function_info(
-                    dep_func, lines, new_prefix, visited, all_data_structures, all_external_funcs
+        Returns:
+            {分类: 函数名集合}，分类与 ExternalFunctionClassifier.classify 一致
+        """
+        all_external = set()
+        for call_tree in self._call_chains.values():
+            if call_tree and call_tree.children:
+                all_external.update(
+                    child.function_name for child in call_tree.children if child.is_external
                 )
 
+        return self.result.external_classifier.classify(all_external)
+
+    def _get_direct_deps(self, func_name: str, indent: str = ""):
+        """
+        获取函数在调用树中的直接依赖，按内部/外部分类（结果按函数名缓存）
+
+        Returns:
+            (内部依赖函数列表, 外部依赖函数集合)
+        """
+        cached = self._direct_deps_cache.get(func_name)
+        if cached is not None:
+            return cached
+
+        direct_internal_deps = []
+        direct_external_deps = set()
+
+        call_tree = self._call_chains.get(func_name, _MISSING)
+        if call_tree is not _MISSING:
+            if call_tree and call_tree.children:
+                logger.info("%s[递归展开]   找到 %d 个直接调用", indent, len(call_tree.children))
+                # 函数名驻留后，visited/外部函数集合中的比较可走同一对象的快速路径
+                for child in call_tree.children:
+                    if child.is_external:
+                        direct_external_deps.add(sys.intern(child.function_name))
+                    else:
+                        direct_internal_deps.append(sys.intern(child.function_name))
+
+                internal_count = len(direct_internal_deps)
+                external_count = len(direct_external_deps)
+                logger.info("%s[递归展开]   分类: 内部%d个, 外部%d个", indent, internal_count, external_count)
+            else:
+                logger.info("%s[递归展开]   无直接调用", indent)
+        else:
+            logger.info("%s[递归展开]   警告: 未找到调用链信息", indent)
+
+        cached = (direct_internal_deps, direct_external_deps)
+        self._direct_deps_cache[func_name] = cached
+        return cached
+
     def _extract_data_structures_from_single_function(self, func_name: str):
-        """从单个函数签名和边界分析中提取使用的数据结构"""
-        import re
+        """从单个函数签名和边界分析中提取使用的数据结构（结果按函数名缓存）"""
+        cached = self._ds_cache.get(func_name)
+        if cached is not None:
+            return cached
+
         used_ds = {}
 
-        if func_name not in self.result.function_signatures:
+        sig = self._signatures.get(func_name)
+        if sig is None:
             return used_ds
 
-        sig = self.result.function_signatures[func_name]
-        logger.info(f"\n[数据结构提取] 分析函数: {func_name}")
-        logger.info(f"[数据结构提取] 签名: {sig[:100]}...")
-
-        # 过滤基础类型的模式
-        basic_type_patterns = [
-            r'^VOS_(VOID|INT|UINT|CHAR|BOOL|LONG|SHORT|DWORD|WORD|BYTE)\d*$',
-            r'^DIAM_(VOID|INT|UINT|CHAR|BOOL|UINT32|INT32)\d*$',
-        ]
+        logger.info("\n[数据结构提取] 分析函数: %s", func_name)
+        logger.info("[数据结构提取] 签名: %s...", sig[:100])
 
         # 检查已知的数据结构（文件内部定义的），但过滤掉基础类型
+        if self._valid_ds is None:
+            self._classify_data_structures()
+        valid_ds = self._valid_ds
+        basic_ds = self._basic_ds
+
         internal_count = 0
         filtered_count = 0
-        for ds_name in self.result.data_structures.keys():
-            if ds_name in sig:
-                # 检查是否是基础类型
-                is_basic_type = False
-                for pattern in basic_type_patterns:
-                    if re.match(pattern, ds_name):
-                        is_basic_type = True
-                        logger.info(f"[数据结构提取] ✗ 过滤基础类型: {ds_name} (匹配模式: {pattern})")
-                        filtered_count += 1
-                        break
-
-                if not is_basic_type:
-                    used_ds[ds_name] = self.result.data_structures[ds_name]
-                    logger.info(f"[数据结构提取] ✓ 内部结构: {ds_name}")
-                    internal_count += 1
-
-        logger.info(f"[数据结构提取] 内部结构: 找到 {internal_count} 个, 过滤 {filtered_count} 个")
-
-        # 通用类型提取：从签名中提取所有可能的类型名
-        # 1. 匹配参数类型：类型名 + 指针/引用/空格
-        type_pattern = r'\b([A-Z][a-zA-Z0-9_]*)\s*[\*&\s]'
-        type_matches = re.findall(type_pattern, sig)
-
-        # 2. 匹配类名（成员函数的类）
-        class_pattern = r'\b([A-Z][a-zA-Z0-9_]*)::'
-        class_matches = re.findall(class_pattern, sig)
-
-        # 合并所有匹配
-        all_types = set(type_matches + class_matches)
-
-        # 3. 从函数体中提取实际使用的类型
+        for ident in set(_IDENT_RE.findall(sig)):
+            if ident in valid_ds:
+                used_ds[ident] = valid_ds[ident]
+                logger.info("[数据结构提取] ✓ 内部结构: %s", ident)
+                internal_count += 1
+            elif ident in basic_ds:
+                logger.info("[数据结构提取] ✗ 过滤基础类型: %s", ident)
+                filtered_count += 1
+
+        logger.info("[数据结构提取] 内部结构: 找到 %d 个, 过滤 %d 个", internal_count, filtered_count)
+
+        # 通用类型提取：一次扫描签名，匹配参数类型和成员函数的类名
+        # 正则要求大写字母开头，纯小写签名（如 int foo(void)）直接跳过
+        sig_types = _SIG_TYPE_RE.findall(sig) if sig != sig.lower() else []
+        all_types = set(sig_types)
+
+        # 从函数体中提取实际使用的类型
         boundary_types_count = 0
         function_body_types = self._extract_types_from_function_body(func_name)
         if function_body_types:
             all_types.update(function_body_types)
             boundary_types_count = len(function_body_types)
-            logger.info(f"[数据结构提取] 函数体分析: 找到 {boundary_types_count} 个类型")
+            logger.info("[数据结构提取] 函数体分析: 找到 %d 个类型", boundary_types_count)
 
-        logger.info(f"[数据结构提取] 正则提取: {len(type_matches)} 个参数类型, {len(class_matches)} 个类名, 边界分析 {boundary_types_count} 个")
+        logger.info("[数据结构提取] 正则提取: %d 个签名类型, 边界分析 %d 个", len(sig_types), boundary_types_count)
         if all_types:
-            logger.info(f"[数据结构提取] 待过滤类型: {sorted(all_types)}")
-
-        # 过滤关键字和基础类型
-        keywords = {'VOID', 'INT', 'CHAR', 'BOOL', 'FLOAT', 'DOUBLE', 'LONG', 'SHORT',
-                   'CONST', 'STATIC', 'INLINE', 'VIRTUAL', 'EXPLICIT', 'TYPEDEF',
-                   'UNSIGNED', 'SIGNED'}
-        basic_typedefs = {'UINT8', 'UINT16', 'UINT32', 'UINT64',
-                         'INT8', 'INT16', 'INT32', 'INT64',
-                         'DWORD', 'WORD', 'BYTE', 'SIZE_T'}
-
-        # 常见的参数名模式（这些不应该被识别为类型）
-        param_name_patterns = [
-            r'^p[A-Z]',         # pMsg, pBuf, pValue - 指针参数命名习惯
-            r'^ps[A-Z]',        # psLocalAddr, psRemoteAddr - 指针到结构体
-            r'^puc[A-Z]',       # pucData, pucStr - 指针到unsigned char
-            r'^pul[A-Z]',       # pulDataLength, pulHandleTm - 指针到unsigned long
-            r'^ph[A-Z]',        # phTimerGrp - 句柄指针
-            r'^(IN|OUT|INOUT|IO)$',  # 参数方向修饰符
-            r'^PT[A-Z]',        # PTDiamOsAllocMsg - 函数指针类型前缀
-        ]
-
-        # 常见的宏/修饰符
-        common_macros = {'IN', 'OUT', 'INOUT', 'IO', 'OPTIONAL', 'CONST'}
+            logger.info("[数据结构提取] 待过滤类型: %s", sorted(all_types))
 
         external_count = 0
         external_filtered = 0
+        # 过滤条件绑定为局部变量，循环内走局部变量查找
+        filter_words = _FILTER_WORDS
+        filter_match = _TYPE_FILTER_RE.match
         for type_name in all_types:
             # 1. 跳过关键字和基础typedef
-            if type_name.upper() in keywords or type_name.upper() in basic_typedefs:
-                logger.info(f"[数据结构提取] ✗ 过滤关键字/基础typedef: {type_name}")
+            if type_name.upper() in filter_words:
+                logger.info("[数据结构提取] ✗ 过滤关键字/基础typedef: %s", type_name)
                 external_filtered += 1
                 continue
 
-            # 2. 跳过常见宏
-            if type_name in common_macros:
-                logger.info(f"[数据结构提取] ✗ 过滤宏定义: {type_name}")
+            # 2. 跳过常见宏、参数名模式和项目基础类型
+            match = filter_match(type_name)
+            if match:
+                logger.info("[数据结构提取] ✗ 过滤%s: %s", _TYPE_FILTER_REASONS[match.lastgroup], type_name)
                 external_filtered += 1
                 continue
 
-            # 3. 跳过参数名模式
-            is_param_name = False
-            for pattern in param_name_patterns:
-                if re.match(pattern, type_name):
-                    logger.info(f"[数据结构提取] ✗ 过滤参数名: {type_name} (匹配 {pattern})")
-                    external_filtered += 1
-                    is_param_name = True
-                    break
-
-            if is_param_name:
-                continue
-
-            # 4. 跳过已添加的
+            # 3. 跳过已添加的
             if type_name in used_ds:
                 continue
 
-            # 5. 跳过基础类型模式
-            is_basic_type = False
-            for pattern in basic_type_patterns:
-                if re.match(pattern, type_name):
-                    is_basic_type = True
-                    logger.info(f"[数据结构提取] ✗ 过滤项目基础类型: {type_name}")
-                    external_filtered += 1
-                    break
-
-            if not is_basic_type:
-                # 添加为外部类型
-                used_ds[type_name] = None
-                logger.info(f"[数据结构提取] ✓ 外部类型: {type_name}")
-                external_count += 1
+            # 添加为外部类型
+            used_ds[type_name] = None
+            logger.info("[数据结构提取] ✓ 外部类型: %s", type_name)
+            external_count += 1
 
-        logger.info(f"[数据结构提取] 外部类型: 找到 {external_count} 个, 过滤 {external_filtered} 个")
-        logger.info(f"[数据结构提取] 总计: {len(used_ds)} 个数据结构 (内部 {internal_count} + 外部 {external_count})")
+        logger.info("[数据结构提取] 外部类型: 找到 %d 个, 过滤 %d 个", external_count, external_filtered)
+        logger.info("[数据结构提取] 总计: %d 个数据结构 (内部 %d + 外部 %d)", len(used_ds), internal_count, external_count)
 
+        # 按名称排序后缓存，输出时直接按插入顺序使用，无需每次排序
+        used_ds = {name: used_ds[name] for name in sorted(used_ds)}
+        self._ds_cache[func_name] = used_ds
         return used_ds
 
+    def _classify_data_structures(self):
+        """将文件内部数据结构一次性分为有效结构与基础类型（VOS_*/DIAM_*）"""
+        self._valid_ds = {}
+        self._basic_ds = set()
+        for ds_name, ds_info in self._data_structures.items():
+            if _BASIC_TYPE_RE.fullmatch(ds_name):
+                self._basic_ds.add(ds_name)
+            else:
+                self._valid_ds[ds_name] = ds_info
+
     def _extract_types_from_function_body(self, func_name: str) -> set:
         """
         从函数体的 AST 节点中提取实际使用的类型
@@ -674,59 +808,43 @@ class FunctionReporter:
         """
         types = set()
 
-        # 检查是否有 file_boundary 和函数节点信息
-        if not self.result.file_boundary:
-            logger.debug(f"[函数体类型提取] 无 file_boundary 信息")
-            return types
-
-        file_boundary = self.result.file_boundary
-
-        # 检查是否有函数信息
-        if not hasattr(file_boundary, 'file_functions') or not file_boundary.file_functions:
-            logger.debug(f"[函数体类型提取] file_boundary 无 file_functions")
+        # 检查是否有函数信息（file_boundary 缺失时 _file_functions 为空）
+        if not self._file_functions:
+            logger.debug("[函数体类型提取] file_boundary 无 file_functions")
             return types
 
         # 检查函数是否在文件中
-        if func_name not in file_boundary.file_functions:
-            logger.debug(f"[函数体类型提取] 函数 {func_name} 不在 file_functions 中")
+        func_info = self._file_functions.get(func_name)
+        if func_info is None:
+            logger.debug("[函数体类型提取] 函数 %s 不在 file_functions 中", func_name)
             return types
 
         # 获取函数节点和源代码
-        func_info = file_boundary.file_functions[func_name]
         func_node = func_info.get('node')
-        source_code = file_boundary.source_code
+        source_code = self.result.file_boundary.source_code
 
         if not func_node or not source_code:
-            logger.debug(f"[函数体类型提取] 缺少函数节点或源代码")
+            logger.debug("[函数体类型提取] 缺少函数节点或源代码")
             return types
 
         # 从函数体中提取类型
-        from ..cpp_parser import CppParser
-
         # 1. 查找函数体节点
         body_node = func_node.child_by_field_name('body')
         if not body_node:
-            logger.debug(f"[函数体类型提取] 函数 {func_name} 无函数体")
+            logger.debug("[函数体类型提取] 函数 %s 无函数体", func_name)
             return types
 
-        # 2. 从函数体中查找所有 type_identifier
-        type_nodes = CppParser.find_nodes_by_type(body_node, 'type_identifier')
-        for type_node in type_nodes:
-            type_name = CppParser.get_node_text(type_node, source_code)
-            if type_name:
-                types.add(type_name)
-
-        # 3. 查找结构体/类类型的限定名（如 struct Foo）
-        struct_specifiers = CppParser.find_nodes_by_type(body_node, 'struct_specifier')
-        for spec_node in struct_specifiers:
-            # 获取结构体名称
-            name_node = spec_node.child_by_field_name('name')
-            if name_node:
-                struct_name = CppParser.get_node_text(name_node, source_code)
-                if struct_name:
-                    types.add(struct_name)
-
-        logger.debug(f"[函数体类型提取] 从函数体提取到 {len(types)} 个类型: {sorted(types)}")
+        # 2. 用 tree-sitter 查询收集所有 type_identifier 和结构体/类名称（如 struct Foo）
+        #    先按字节切片去重，每个不同的类型名只解码一次
+        raw_names = {
+            source_code[type_node.start_byte:type_node.end_byte]
+            for type_node, _ in CppParser.query(_BODY_TYPES_QUERY).captures(body_node)
+        }
+        for raw_name in raw_names:
+            if raw_name:
+                types.add(sys.intern(CppParser.decode_text(raw_name)))
+
+        logger.debug("[函数体类型提取] 从函数体提取到 %d 个类型: %s", len(types), sorted(types))
 
         return types
 
@@ -740,41 +858,38 @@ class FunctionReporter:
         Returns:
             展开宏后的定义
         """
-        import re
-
         lines = definition.split('\n')
         result_lines = []
+        _append = result_lines.append
 
         for line in lines:
             # 检查是否有独立的宏标识符（全大写+下划线）
-            # 匹配类似 "    VOS_MSG_HEADER" 或 "    VOS_MSG_HEADER  /* comment */"
-            match = re.match(r'^(\s*)([A-Z][A-Z0-9_]+)\s*(\/\*.*\*\/)?$', line.strip())
+            match = _STRUCT_MACRO_RE.match(line)
             if match:
-                indent = re.match(r'^(\s*)', line).group(1)  # 保留原缩进
-                macro_name = match.group(2)
-                comment = match.group(3) or ''  # 保留注释
+                indent = match['indent']  # 保留原缩进
+                macro_name = match['macro']
+                comment = match['comment'] or ''  # 保留注释
 
-                logger.debug(f"[宏展开] 检测到结构体宏: {macro_name}")
+                logger.debug("[宏展开] 检测到结构体宏: %s", macro_name)
 
                 # 尝试展开这个宏
                 expansion = self.macro_extractor.extract_struct_macro(macro_name)
                 if expansion:
                     # 添加注释标记
-                    result_lines.append(f"{indent}/* {macro_name} 展开: */")
+                    _append(f"{indent}/* {macro_name} 展开: */")
                     # 添加展开内容（保持原缩进）
-                    for exp_line in expansion.split('\n'):
-                        result_lines.append(f"{indent}{exp_line}")
+                    result_lines.extend(f"{indent}{exp_line}" for exp_line in expansion.split('\n'))
                     # 如果原行有注释，也保留
                     if comment:
-                        result_lines.append(f"{indent}{comment}")
-                    logger.info(f"[宏展开] ✓ {macro_name}: 已展开到结构体定义中")
+                        _append(f"{indent}{comment}")
+                    logger.info("[宏展开] ✓ %s: 已展开到结构体定义中", macro_name)
                 else:
                     # 未找到展开，保留原行
-                    result_lines.append(line)
-                    logger.debug(f"[宏展开] ✗ {macro_name}: 未找到定义")
+                    _append(line)
+                    logger.debug("[宏展开] ✗ %s: 未找到定义", macro_name)
             else:
                 # 普通行，直接保留
-                result_lines.append(line)
+                _append(line)
 
         return '\n'.join(result_lines)
 
@@ -4,7 +4,8 @@
 用于查找 #define、enum、const 等常量定义
 """
 import re
-from typing import Optional
+from pathlib import Path
+from typing import Dict, List, Optional
 from .grep_searcher import GrepSearcher
 
 
@@ -17,6 +18,10 @@ class ConstantSearcher:
             project_root: 项目根目录路径
         """
         self.grep = GrepSearcher(project_root)
+        # 组合搜索模式缓存 {常量名: '|' 连接后的模式}
+        self._pattern_cache: Dict[str, str] = {}
+        # 头文件行缓存 {文件路径: 行列表}，同一头文件中的多个 enum 成员共享一次读取
+        self._file_lines: Dict[Path, List[str]] = {}
 
     def search(self, const_name: str) -> Optional[str]:
         """
@@ -28,9 +33,11 @@ class ConstantSearcher:
         Returns:
             常量定义文本，未找到返回 None
         """
-        # 构造搜索模式
-        patterns = self._build_patterns(const_name)
-        combined = '|'.join(patterns)
+        # 构造搜索模式（同名常量只构造一次）
+        combined = self._pattern_cache.get(const_name)
+        if combined is None:
+            combined = '|'.join(self._build_patterns(const_name))
+            self._pattern_cache[const_name] = combined
 
         # 搜索匹配的内容
         matches = self.grep.search_content(
@@ -92,9 +99,11 @@ class ConstantSearcher:
         Returns:
             True 表示可能是 enum 成员
         """
-        # 简单启发：没有 # 且有 = 且没有分号结尾
+        # 简单启发：没有 # 且有 = 且没有分号结尾（先按首字符短路，再扫描 =）
         line = line.strip()
-        return '=' in line and not line.startswith('#') and not line.endswith(';')
+        if not line or line[0] == '#':
+            return False
+        return line[-1] != ';' and '=' in line
 
     def _extract_enum_context(self, file_path, line_num: int, const_name: str) -> Optional[str]:
         """
@@ -111,8 +120,11 @@ class ConstantSearcher:
             带上下文的定义
         """
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
+            lines = self._file_lines.get(file_path)
+            if lines is None:
+                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    lines = f.readlines()
+                self._file_lines[file_path] = lines
 
             line = lines[line_num - 1].strip()
             return f"// 来自: {file_path.name}:{line_num}\n{line}"
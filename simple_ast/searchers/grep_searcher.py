@@ -3,18 +3,32 @@
 
 使用系统的 grep 命令（Git Bash 自带）或 ripgrep 进行快速文本搜索
 """
+import base64
+import json
+import mmap
 import subprocess
 import re
-import tempfile
-import os
+import threading
 from pathlib import Path
-from typing import List, Optional, Tuple, Dict
-import sys
+from typing import Callable, List, Optional, Tuple, Dict
 from .search_config import get_search_config
 from ..logger import get_logger
 
 logger = get_logger()
 
+# 进程级搜索结果缓存：各搜索器各自持有 GrepSearcher 实例，
+# 同一分析过程中相同的查询只执行一次外部命令
+_RESULT_CACHE: Dict[tuple, object] = {}
+
+# _find_struct_start 最多向上查看 100 行，再向上 5 行查找 typedef/struct
+_STRUCT_LOOKBACK_LINES = 105
+# 定位行号时按块统计换行符的块大小
+_LINE_SCAN_CHUNK = 8192
+
+# grep 输出行: 文件路径:行号:内容
+# Windows 绝对路径以盘符开头（如 D:\path\file.h:123:content），盘符冒号属于路径
+_GREP_LINE_RE = re.compile(r'(?:([^:]:[\\/][^:]*)|([^:]*)):([^:]*):(.*)', re.S)
+
 
 class GrepSearcher:
     """基于 grep/ripgrep 命令的通用搜索器"""
@@ -26,6 +40,17 @@ class GrepSearcher:
         """
         self.project_root = Path(project_root).resolve()
         self.config = get_search_config()  # 获取全局配置
+        # ripgrep 使用 JSON 输出，避免按冒号拆分路径和内容
+        self._json_output = self.config.command == 'rg'
+
+    @staticmethod
+    def clear_cache():
+        """清空搜索结果缓存（项目文件发生变化时调用）"""
+        _RESULT_CACHE.clear()
+
+    def _cache_key(self, *args) -> tuple:
+        """构造缓存键：项目根目录和搜索工具不同的结果互不复用"""
+        return (str(self.project_root), self.config.command) + args
 
     def search_files(
         self,
@@ -46,6 +71,11 @@ class GrepSearcher:
         Returns:
             匹配的文件路径列表
         """
+        key = self._cache_key('files', pattern, file_glob, max_results, ignore_case)
+        cached = _RESULT_CACHE.get(key)
+        if cached is not None:
+            return list(cached)
+
         # 使用配置构建命令
         cmd = self.config.build_search_command(
             pattern=pattern,
@@ -55,33 +85,11 @@ class GrepSearcher:
             ignore_case=ignore_case
         )
 
-        try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=30,
-                encoding='utf-8',
-                errors='ignore'  # 忽略编码错误
-            )
-
-            if result.returncode == 0:
-                files = [Path(line.strip()) for line in result.stdout.splitlines() if line.strip()]
-                return files[:max_results]
-            else:
-                # returncode = 1 表示没找到，2 表示错误
-                if result.returncode == 1:
-                    return []  # 没找到
-                else:
-                    logger.error(f"grep错误: {result.stderr}")
-                    return []
-
-        except subprocess.TimeoutExpired:
-            logger.error(f"grep超时: 搜索 {pattern} 超时")
-            return []
-        except Exception as e:
-            logger.error(f"grep异常: {e}")
-            return []
+        lines, complete = self._run_streaming(cmd, pattern, max_results, timeout=30)
+        files = [Path(line.strip()) for line in lines]
+        if complete:
+            _RESULT_CACHE[key] = files
+        return list(files)
 
     def search_content(
         self,
@@ -104,13 +112,30 @@ class GrepSearcher:
         Returns:
             列表：[(文件路径, 行号, 匹配的行内容), ...]
         """
-        # 使用脚本文件方式执行，避免参数传递问题
-        return self._search_via_script(
+        key = self._cache_key('content', pattern, file_glob, max_results)
+        cached = _RESULT_CACHE.get(key)
+        if cached is not None:
+            return list(cached)
+
+        cmd = self.config.build_search_command(
             pattern=pattern,
+            path=str(self.project_root),
             file_glob=file_glob,
-            max_results=max_results,
-            show_line_numbers=show_line_numbers
+            show_files_only=False,
+            show_line_numbers=True,  # 解析输出依赖行号
+            json_output=self._json_output,
+            max_count=max_results  # 单个文件的匹配不会超过总数上限
+        )
+
+        # 解析输出（路径先保持为字符串，只为返回的结果构造 Path）
+        parsed, complete = self._run_streaming(
+            cmd, pattern, max_results, timeout=30, parse=self._parse_output_line
         )
+        matches = [(Path(file_path), line_num, content) for file_path, line_num, content in parsed]
+
+        if complete:
+            _RESULT_CACHE[key] = matches
+        return list(matches)
 
     def search_content_batch(
         self,
@@ -132,197 +157,233 @@ class GrepSearcher:
         if not patterns:
             return {}
 
-        try:
-            # 根据操作系统选择脚本类型
-            is_windows = sys.platform == 'win32'
-            suffix = '.bat' if is_windows else '.sh'
-
-            # 创建临时脚本文件
-            with tempfile.NamedTemporaryFile(
-                mode='w',
-                suffix=suffix,
-                delete=False,
-                encoding='utf-8'
-            ) as script_file:
-                script_path = script_file.name
-
-                # 构建批量搜索命令
-                if self.config.command == 'rg':
-                    # ripgrep 支持多个 -e 参数
-                    pattern_args = ' '.join([f'-e "{p}"' for p in patterns])
-                    cmd = f'rg -n --glob="{file_glob}" {pattern_args} "{self.project_root}"'
-                elif self.config.command == 'grep':
-                    # grep 使用 -e 参数
-                    pattern_args = ' '.join([f'-e "{p}"' for p in patterns])
-                    cmd = f'grep -r -E -n --include="{file_glob}" {pattern_args} "{self.project_root}"'
-                else:
-                    return {}
+        key = self._cache_key('batch', tuple(patterns), file_glob, max_results_per_pattern)
+        cached = _RESULT_CACHE.get(key)
+        if cached is not None:
+            return {p: list(results) for p, results in cached.items()}
 
-                # 写入脚本
-                if is_windows:
-                    script_file.write('@echo off\n')
-                    script_file.write('chcp 65001 >nul\n')
-                    script_file.write(cmd + '\n')
-                else:
-                    script_file.write('#!/bin/bash\n')
-                    script_file.write(cmd + '\n')
-
-            # 执行脚本
-            if is_windows:
-                result = subprocess.run(
-                    [script_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=60,  # 批量搜索可能需要更长时间
-                    encoding='utf-8',
-                    errors='ignore',
-                    shell=True
-                )
-            else:
-                result = subprocess.run(
-                    ['bash', script_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=60,
-                    encoding='utf-8',
-                    errors='ignore'
-                )
-
-            # 删除临时脚本
-            try:
-                os.unlink(script_path)
-            except:
-                pass
+        # 入口处一次性编译全部模式，无效模式不参与结果分组
+        results_by_pattern = {p: [] for p in patterns}
+        matchers = self._compile_matchers(patterns, results_by_pattern)
+        if not matchers:
+            return results_by_pattern
+
+        # 多个模式以 -e 参数逐个传入，一次进程完成搜索（只传入编译通过的模式）
+        cmd = self.config.build_search_command(
+            pattern=[pattern for _, pattern, _ in matchers],
+            path=str(self.project_root),
+            file_glob=file_glob,
+            show_files_only=False,
+            show_line_numbers=True,
+            json_output=self._json_output
+        )
+
+        try:
+            result = subprocess.run(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,  # 出错时再单独获取诊断信息
+                text=True,
+                timeout=60,  # 批量搜索可能需要更长时间
+                encoding='utf-8',
+                errors='ignore'
+            )
 
             if result.returncode != 0 and result.returncode != 1:
-                logger.error(f"批量搜索错误: {result.stderr}")
+                logger.error(f"批量搜索错误: {self._error_output(cmd, 60)}")
                 return {}
 
             # 解析输出并按模式分组
-            results_by_pattern = {p: [] for p in patterns}
+            # 同一文件的多条结果共用一个 Path 对象，未保留的行不构造 Path
+            paths: Dict[str, Path] = {}
 
-            for line in result.stdout.splitlines():
-                parsed = self._parse_grep_line(line)
+            for line in result.stdout.split('\n'):
+                parsed = self._parse_output_line(line)
                 if not parsed:
                     continue
 
                 file_path, line_num, content = parsed
 
-                # 判断这行匹配哪个模式
-                for pattern in patterns:
-                    try:
-                        if re.search(pattern, content):
-                            if len(results_by_pattern[pattern]) < max_results_per_pattern:
-                                results_by_pattern[pattern].append((file_path, line_num, content))
-                    except re.error:
+                # 判断这行匹配哪个模式（已满的模式不再匹配）
+                for bucket, literal, regex in matchers:
+                    if len(bucket) >= max_results_per_pattern:
                         continue
+                    if (literal in content) if regex is None else regex.search(content):
+                        path = paths.get(file_path)
+                        if path is None:
+                            path = paths[file_path] = Path(file_path)
+                        bucket.append((path, line_num, content))
 
-            return results_by_pattern
+            _RESULT_CACHE[key] = results_by_pattern
+            return {p: list(results) for p, results in results_by_pattern.items()}
 
         except Exception as e:
             logger.error(f"批量搜索异常: {e}")
             return {}
 
-    def _search_via_script(
+    @staticmethod
+    def _compile_matchers(patterns: List[str], results_by_pattern: Dict[str, list]) -> list:
+        """
+        预编译批量搜索的模式，纯文本模式直接使用子串判断
+
+        Args:
+            patterns: 正则表达式模式列表
+            results_by_pattern: 各模式的结果列表
+
+        Returns:
+            列表：[(结果列表, 纯文本模式, 编译后的正则或 None), ...]
+        """
+        matchers = []
+        for pattern in patterns:
+            if re.escape(pattern) == pattern:
+                matchers.append((results_by_pattern[pattern], pattern, None))
+                continue
+            try:
+                matchers.append((results_by_pattern[pattern], pattern, re.compile(pattern)))
+            except re.error as e:
+                # Python 无法解析的模式（与 grep 语法不兼容）跳过
+                logger.warning(f"批量搜索模式无效，已忽略: {pattern} ({e})")
+        return matchers
+
+    def _run_streaming(
         self,
+        cmd: list,
         pattern: str,
-        file_glob: str,
-        max_results: int,
-        show_line_numbers: bool
-    ) -> List[Tuple[Path, int, str]]:
+        max_lines: int,
+        timeout: int,
+        parse: Optional[Callable[[str], Optional[tuple]]] = None
+    ) -> Tuple[list, bool]:
         """
-        通过临时脚本文件执行搜索，避免参数传递和转义问题
+        逐行读取搜索输出，得到 max_lines 条结果后立即终止进程
+
+        超时由定时器终止进程，已读到的结果仍然返回。
 
         Args:
-            pattern: 搜索模式
-            file_glob: 文件通配符
-            max_results: 最大结果数
-            show_line_numbers: 是否显示行号
+            cmd: 搜索命令（参数列表，不经过 shell）
+            pattern: 搜索模式（用于日志）
+            max_lines: 最多返回的结果数
+            timeout: 超时时间（秒）
+            parse: 行解析函数，返回 None 的行被忽略；为 None 时返回原始行
 
         Returns:
-            匹配结果列表
+            (结果列表（原始行已去除行尾换行）, 结果是否完整可缓存)
         """
+        if max_lines <= 0:
+            return [], True
+
+        lines = []
+        timed_out = threading.Event()
         try:
-            # 根据操作系统选择脚本类型
-            is_windows = sys.platform == 'win32'
-            suffix = '.bat' if is_windows else '.sh'
-
-            # 创建临时脚本文件
-            with tempfile.NamedTemporaryFile(
-                mode='w',
-                suffix=suffix,
-                delete=False,
-                encoding='utf-8'
-            ) as script_file:
-                script_path = script_file.name
-
-                # 根据工具类型构建命令
-                if self.config.command == 'grep':
-                    cmd = f'grep -r -E -n --include="{file_glob}" "{pattern}" "{self.project_root}"'
-                elif self.config.command == 'rg':
-                    cmd = f'rg -n --glob="{file_glob}" "{pattern}" "{self.project_root}"'
-                else:
-                    return []
-
-                # 写入脚本
-                if is_windows:
-                    # Windows 批处理脚本
-                    script_file.write('@echo off\n')
-                    script_file.write('chcp 65001 >nul\n')  # 设置 UTF-8 编码
-                    script_file.write(cmd + '\n')
-                else:
-                    # Linux/Mac bash 脚本
-                    script_file.write('#!/bin/bash\n')
-                    script_file.write(cmd + '\n')
-
-            # 执行脚本
-            if is_windows:
-                # Windows 上直接执行批处理文件
-                result = subprocess.run(
-                    [script_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=30,
-                    encoding='utf-8',
-                    errors='ignore',
-                    shell=True
-                )
-            else:
-                # Linux/Mac 上使用 bash 执行
-                result = subprocess.run(
-                    ['bash', script_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=30,
-                    encoding='utf-8',
-                    errors='ignore'
-                )
-
-            # 删除临时脚本
-            try:
-                os.unlink(script_path)
-            except:
-                pass
+            with subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,  # 出错时再单独获取诊断信息
+                text=True,
+                encoding='utf-8',
+                errors='ignore'  # 忽略编码错误
+            ) as proc:
 
-            if result.returncode != 0 and result.returncode != 1:
+                def _on_timeout():
+                    timed_out.set()
+                    proc.kill()
+
+                timer = threading.Timer(timeout, _on_timeout)
+                timer.start()
+                try:
+                    for line in proc.stdout:
+                        line = line.rstrip('\n')
+                        if not line.strip():
+                            continue
+                        if parse is not None:
+                            line = parse(line)
+                            if line is None:
+                                continue
+                        lines.append(line)
+                        if len(lines) >= max_lines:
+                            proc.kill()  # 结果已够，不再等待搜索结束
+                            break
+                    proc.wait()
+                finally:
+                    timer.cancel()
+
+            if len(lines) >= max_lines:
+                return lines, True
+            if timed_out.is_set():
+                logger.error(f"搜索超时: 搜索 {pattern} 超时，返回已找到的 {len(lines)} 条结果")
+                return lines, False
+            if proc.returncode != 0 and proc.returncode != 1:
                 # returncode=1 表示没找到（正常），其他非0是错误
-                logger.error(f"搜索错误: {result.stderr}")
-                return []
+                logger.error(f"搜索错误: {self._error_output(cmd, timeout)}")
+                return [], False
+            return lines, True
 
-            # 解析输出
-            matches = []
-            for line in result.stdout.splitlines()[:max_results]:
-                parsed = self._parse_grep_line(line)
-                if parsed:
-                    matches.append(parsed)
+        except Exception as e:
+            logger.error(f"搜索异常: {e}")
+            return [], False
 
-            return matches
+    @staticmethod
+    def _error_output(cmd: list, timeout: int) -> str:
+        """
+        搜索失败时重新执行一次并捕获 stderr，仅用于输出诊断信息
+
+        正常搜索不读取 stderr；出错很少见，此时多执行一次换取完整的错误信息。
+
+        Args:
+            cmd: 失败的搜索命令
+            timeout: 超时时间（秒）
 
+        Returns:
+            错误输出文本
+        """
+        try:
+            result = subprocess.run(
+                cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+                timeout=timeout,
+                encoding='utf-8',
+                errors='ignore'
+            )
+            return result.stderr.strip() or f"returncode={result.returncode}"
         except Exception as e:
-            logger.error(f"脚本搜索异常: {e}")
-            return []
+            return str(e)
 
-    def _parse_grep_line(self, line: str) -> Optional[Tuple[Path, int, str]]:
+    def _parse_output_line(self, line: str) -> Optional[Tuple[str, int, str]]:
+        """按当前搜索工具的输出格式解析一行"""
+        if self._json_output:
+            return self._parse_rg_json(line)
+        return self._parse_grep_line(line)
+
+    @staticmethod
+    def _parse_rg_json(line: str) -> Optional[Tuple[str, int, str]]:
+        """
+        解析 ripgrep --json 输出的一行
+
+        Args:
+            line: JSON 消息行（begin/match/end/summary 等）
+
+        Returns:
+            match 消息返回 (文件路径, 行号, 内容)，其他消息返回 None
+        """
+        if not line.startswith('{"type":"match"'):
+            return None
+        try:
+            data = json.loads(line)['data']
+            path = GrepSearcher._rg_json_text(data['path'])
+            content = GrepSearcher._rg_json_text(data['lines'])
+            return (path, data['line_number'], content.rstrip('\r\n'))
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    @staticmethod
+    def _rg_json_text(value: dict) -> str:
+        """取出 ripgrep JSON 的文本字段（非 UTF-8 内容以 base64 的 bytes 字段给出）"""
+        if 'text' in value:
+            return value['text']
+        return base64.b64decode(value['bytes']).decode('utf-8', errors='ignore')
+
+    def _parse_grep_line(self, line: str) -> Optional[Tuple[str, int, str]]:
         """
         解析 grep 输出的一行
 
@@ -332,39 +393,14 @@ class GrepSearcher:
         Returns:
             (文件路径, 行号, 内容) 或 None
         """
-        # Windows路径处理：检查是否以盘符开头 (如 D:\)
-        if len(line) > 2 and line[1] == ':' and line[2] in ('\\', '/'):
-            # Windows绝对路径，找第3个冒号(文件路径后的冒号)
-            # 格式: D:\path\file.h:123:content
-            colon_positions = [i for i, c in enumerate(line) if c == ':']
-            if len(colon_positions) >= 2:
-                # 第一个冒号是盘符，第二个是行号前，第三个（如果有）是content前
-                file_path_end = colon_positions[1]
-                file_path = Path(line[:file_path_end])
-
-                remaining = line[file_path_end + 1:]  # 跳过第二个冒号
-                parts = remaining.split(':', 1)  # 分成 line_num 和 content
-
-                if len(parts) >= 2:
-                    try:
-                        line_num = int(parts[0])
-                        content = parts[1]
-                        return (file_path, line_num, content)
-                    except ValueError:
-                        pass
-        else:
-            # Unix路径或相对路径，使用原有逻辑
-            parts = line.split(':', 2)
-            if len(parts) >= 3:
-                file_path = Path(parts[0])
-                try:
-                    line_num = int(parts[1])
-                    content = parts[2]
-                    return (file_path, line_num, content)
-                except ValueError:
-                    pass
-
-        return None
+        match = _GREP_LINE_RE.match(line)
+        if match is None:
+            return None
+        windows_path, unix_path, line_num, content = match.groups()
+        try:
+            return (windows_path or unix_path, int(line_num), content)
+        except ValueError:
+            return None
 
     def search_content_old(
         self,
@@ -505,13 +541,17 @@ class GrepSearcher:
 
         file_path, match_line = first_match
 
-        # 2. 读取文件，提取完整定义
+        # 2. 只读取匹配行附近的窗口，提取完整定义
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
+            match_idx = match_line - 1
+            window = self.read_line_window(file_path, match_idx, _STRUCT_LOOKBACK_LINES, max_lines)
+            if window is None:
+                return None
+            lines, base_idx = window
+            # 以下索引均相对于窗口
+            match_idx -= base_idx
 
             # 检查匹配行的内容
-            match_idx = match_line - 1
             match_content = lines[match_idx].strip()
 
             # 情况1: 匹配行是 } MSG_CB, MsgBlock; 形式（typedef 结尾）
@@ -528,7 +568,7 @@ class GrepSearcher:
                     definition_lines.append(lines[i].rstrip())
 
                 definition = '\n'.join(definition_lines)
-                return f"// 来自: {file_path.name}:{start_idx + 1}\n{definition}"
+                return f"// 来自: {file_path.name}:{base_idx + start_idx + 1}\n{definition}"
 
             # 情况2: 匹配行是 struct MsgBlock { 形式
             # 向下查找结束
@@ -562,12 +602,76 @@ class GrepSearcher:
 
                 # 格式化输出
                 definition = '\n'.join(definition_lines)
-                return f"// 来自: {file_path.name}:{start_idx + 1}\n{definition}"
+                return f"// 来自: {file_path.name}:{base_idx + start_idx + 1}\n{definition}"
 
         except Exception as e:
             logger.error(f"文件读取错误 {file_path}: {e}")
             return None
 
+    @staticmethod
+    def read_line_window(
+        file_path: Path,
+        line_idx: int,
+        before: int,
+        after: int
+    ) -> Optional[Tuple[List[str], int]]:
+        """
+        通过 mmap 读取指定行附近的窗口，不解码整个文件
+
+        行按 \\n 划分（与 grep 的行号一致），只解码窗口内的字节。
+
+        Args:
+            file_path: 文件路径
+            line_idx: 目标行索引（从 0 开始）
+            before: 目标行之前最多读取的行数
+            after: 从目标行开始最多读取的行数
+
+        Returns:
+            (窗口内各行（不含换行符）, 窗口首行索引)，目标行不存在返回 None
+        """
+        with open(file_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                size = len(mm)
+                # 按块统计换行符，跳过目标行之前的整块内容
+                pos = 0
+                remaining = line_idx
+                while remaining:
+                    chunk_end = min(pos + _LINE_SCAN_CHUNK, size)
+                    count = mm[pos:chunk_end].count(b'\n')
+                    if count < remaining:
+                        if chunk_end >= size:
+                            return None
+                        remaining -= count
+                        pos = chunk_end
+                        continue
+                    # 目标行在当前块内，逐个定位剩余的换行符
+                    for _ in range(remaining):
+                        pos = mm.find(b'\n', pos, chunk_end) + 1
+                    remaining = 0
+                if pos >= size:
+                    return None
+
+                # 从目标行向上回退 before 行作为窗口起点
+                lines_before = min(before, line_idx)
+                start = pos
+                for _ in range(lines_before):
+                    start = mm.rfind(b'\n', 0, start - 1) + 1
+
+                end = pos
+                for _ in range(after):
+                    newline = mm.find(b'\n', end)
+                    if newline < 0:
+                        end = size
+                        break
+                    end = newline + 1
+
+                text = mm[start:end].decode('utf-8', errors='ignore')
+
+        lines = text.split('\n')
+        if text.endswith('\n'):
+            lines.pop()
+        return lines, line_idx - lines_before
+
     def _find_struct_start(self, lines: list, end_idx: int) -> Optional[int]:
         """
         从结束行向上查找 struct/typedef 定义的开始
@@ -6,8 +6,13 @@
 - _search_function_signature() 中的头文件搜索
 - _try_read_external_data_structure() 中的头文件搜索
 """
+import fnmatch
+import os
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, Iterator, List
+
+# 递归搜索时跳过的目录（版本控制元数据，不含头文件）
+_SKIP_DIRS = frozenset({'.git', '.svn', '.hg'})
 
 
 class HeaderSearcher:
@@ -41,23 +46,28 @@ class HeaderSearcher:
         Returns:
             头文件路径列表（去重，限制数量）
         """
+        if self.max_files <= 0:
+            return []
+
         target_path = Path(target_file)
-        headers = []
+        # dict 保持插入顺序，去重判断为 O(1)
+        headers: Dict[Path, None] = {}
 
         # 1. 当前文件本身
-        headers.append(target_path)
+        if self._collect(headers, (target_path,)):
+            return list(headers)
 
         # 2. 同目录同名头文件
         header_same_name = target_path.with_suffix('.h')
         if header_same_name.exists():
-            headers.append(header_same_name)
+            if self._collect(headers, (header_same_name,)):
+                return list(headers)
 
         # 3. 同目录所有头文件
         header_dir = target_path.parent
         if header_dir.exists():
-            for h_file in header_dir.glob('*.h'):
-                if h_file not in headers:
-                    headers.append(h_file)
+            if self._collect(headers, self._scan_headers(header_dir)):
+                return list(headers)
 
         # 4. 搜索 include 目录（向上最多 max_depth 层）
         current_dir = target_path.parent
@@ -71,24 +81,66 @@ class HeaderSearcher:
                 if rel_path:
                     sub_include_dir = include_dir / rel_path.name
                     if sub_include_dir.exists():
-                        for h_file in sub_include_dir.glob('*.h'):
-                            if h_file not in headers:
-                                headers.append(h_file)
+                        if self._collect(headers, self._scan_headers(sub_include_dir)):
+                            return list(headers)
 
                 # include 根目录
-                for h_file in include_dir.glob('*.h'):
-                    if h_file not in headers:
-                        headers.append(h_file)
+                if self._collect(headers, self._scan_headers(include_dir)):
+                    return list(headers)
 
                 # 递归搜索 include 下的所有子目录
-                for h_file in include_dir.rglob('*.h'):
-                    if h_file not in headers:
-                        headers.append(h_file)
+                if self._collect(headers, self._scan_headers(include_dir, recursive=True)):
+                    return list(headers)
 
             # 向上一层
             current_dir = current_dir.parent
             if current_dir == current_dir.parent:
                 break
 
-        # 去重并限制数量
-        return headers[:self.max_files]
+        return list(headers)
+
+    def _collect(self, headers: Dict[Path, None], paths: Iterable[Path]) -> bool:
+        """
+        按顺序收集头文件（去重）
+
+        _scan_headers 是惰性迭代，数量达到上限后立即停止，不再遍历剩余目录。
+
+        Args:
+            headers: 已收集的头文件（有序去重）
+            paths: 待收集的头文件路径
+
+        Returns:
+            True 表示已达到数量上限
+        """
+        for h_file in paths:
+            headers.setdefault(h_file, None)
+            if len(headers) >= self.max_files:
+                return True
+        return False
+
+    @staticmethod
+    def _scan_headers(root: Path, recursive: bool = False) -> Iterator[Path]:
+        """
+        惰性列出目录下的 .h 文件
+
+        只为匹配的头文件构造 Path；递归时不跟随符号链接目录，并跳过版本控制目录。
+        顺序与 glob/rglob 一致：目录先序遍历，同一目录内按 scandir 顺序。
+
+        Args:
+            root: 搜索目录
+            recursive: 是否递归子目录
+
+        Yields:
+            头文件路径
+        """
+        root_str = str(root)
+        for dir_path, dir_names, file_names in os.walk(root_str, followlinks=False):
+            # fnmatch 按平台规则比较大小写（Windows 不区分），与 glob 一致
+            header_names = fnmatch.filter(file_names, '*.h')
+            if header_names:
+                dir_obj = Path(dir_path)
+                for file_name in header_names:
+                    yield dir_obj / file_name
+            if not recursive:
+                return
+            dir_names[:] = [d for d in dir_names if d not in _SKIP_DIRS]
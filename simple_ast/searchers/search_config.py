@@ -3,15 +3,18 @@
 
 支持不同的搜索工具：grep (Git Bash)、ripgrep (rg)
 """
-import subprocess
-import sys
+import os
+import shutil
 from enum import Enum
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Union
 from ..logger import get_logger
 
 logger = get_logger()
 
+# 环境变量：指定搜索工具（grep / rg），跳过自动检测
+SEARCH_TOOL_ENV = 'SIMPLEAST_SEARCH_TOOL'
+
 
 class SearchTool(Enum):
     """可用的搜索工具"""
@@ -34,6 +37,13 @@ class SearchConfig:
 
     def _detect_tool(self):
         """检测可用的搜索工具"""
+        if self.tool == SearchTool.AUTO:
+            env_tool = os.environ.get(SEARCH_TOOL_ENV, '').strip().lower()
+            if env_tool in (SearchTool.GREP.value, SearchTool.RIPGREP.value):
+                self.tool = SearchTool(env_tool)
+            elif env_tool:
+                logger.warning(f"{SEARCH_TOOL_ENV}={env_tool} 无效，改为自动检测")
+
         if self.tool == SearchTool.AUTO:
             # 优先使用 ripgrep（更快）
             if self._check_tool_available('rg'):
@@ -59,51 +69,40 @@ class SearchConfig:
         """
         检查工具是否可用
 
+        在 PATH 中查找可执行文件（Windows 下按 PATHEXT 匹配 .exe 等），
+        不启动子进程。
+
         Args:
             cmd: 命令名（如 'grep', 'rg'）
 
         Returns:
             True 表示可用
         """
-        try:
-            # Windows 上直接用 shell=True 调用
-            if sys.platform == 'win32':
-                result = subprocess.run(
-                    f'{cmd} --version',
-                    capture_output=True,
-                    timeout=5,
-                    shell=True
-                )
-            else:
-                # Linux/Mac 上使用 bash
-                result = subprocess.run(
-                    ['bash', '-c', f'{cmd} --version'],
-                    capture_output=True,
-                    timeout=5
-                )
-            return result.returncode == 0
-        except Exception:
-            return False
+        return shutil.which(cmd) is not None
 
     def build_search_command(
         self,
-        pattern: str,
+        pattern: Union[str, List[str]],
         path: str,
         file_glob: Optional[str] = None,
         show_files_only: bool = False,
         show_line_numbers: bool = False,
-        ignore_case: bool = False
+        ignore_case: bool = False,
+        json_output: bool = False,
+        max_count: Optional[int] = None
     ) -> list:
         """
         构建搜索命令
 
         Args:
-            pattern: 搜索模式
+            pattern: 搜索模式；传入列表时每个模式以 -e 参数传递
             path: 搜索路径
             file_glob: 文件匹配模式（如 '*.h'）
             show_files_only: 只显示文件名
             show_line_numbers: 显示行号
             ignore_case: 忽略大小写
+            json_output: 以 JSON 格式输出匹配（仅 ripgrep 支持，grep 忽略）
+            max_count: 每个文件最多匹配行数（None 表示不限制）
 
         Returns:
             命令列表
@@ -111,27 +110,30 @@ class SearchConfig:
         if self.tool == SearchTool.GREP:
             return self._build_grep_command(
                 pattern, path, file_glob,
-                show_files_only, show_line_numbers, ignore_case
+                show_files_only, show_line_numbers, ignore_case,
+                max_count
             )
         elif self.tool == SearchTool.RIPGREP:
             return self._build_ripgrep_command(
                 pattern, path, file_glob,
-                show_files_only, show_line_numbers, ignore_case
+                show_files_only, show_line_numbers, ignore_case,
+                json_output, max_count
             )
         else:
             raise RuntimeError(f"不支持的搜索工具: {self.tool}")
 
     def _build_grep_command(
         self,
-        pattern: str,
+        pattern: Union[str, List[str]],
         path: str,
         file_glob: Optional[str],
         show_files_only: bool,
         show_line_numbers: bool,
-        ignore_case: bool
+        ignore_case: bool,
+        max_count: Optional[int] = None
     ) -> list:
         """构建 grep 命令"""
-        cmd = ['grep', '-r', '-E']  # 递归搜索，使用扩展正则表达式
+        cmd = ['grep', '-r', '-E', '-s']  # 递归搜索，使用扩展正则表达式，不输出文件读取错误
 
         if show_files_only:
             cmd.append('-l')  # 只显示文件名
@@ -142,43 +144,62 @@ class SearchConfig:
         if ignore_case:
             cmd.append('-i')  # 忽略大小写
 
+        if max_count is not None:
+            cmd.extend(['-m', str(max_count)])  # 每个文件匹配够即停止读取该文件
+
         if file_glob:
             cmd.append(f'--include={file_glob}')  # 文件过滤
 
-        cmd.append(pattern)
+        self._append_patterns(cmd, pattern)
         cmd.append(path)
 
         return cmd
 
     def _build_ripgrep_command(
         self,
-        pattern: str,
+        pattern: Union[str, List[str]],
         path: str,
         file_glob: Optional[str],
         show_files_only: bool,
         show_line_numbers: bool,
-        ignore_case: bool
+        ignore_case: bool,
+        json_output: bool = False,
+        max_count: Optional[int] = None
     ) -> list:
         """构建 ripgrep 命令"""
-        cmd = ['rg']
+        cmd = ['rg', '--no-messages']  # 不输出文件读取错误
 
         if show_files_only:
             cmd.append('-l')  # 只显示文件名
         else:
             if show_line_numbers:
                 cmd.append('-n')  # 显示行号（ripgrep 默认显示）
+            if json_output:
+                cmd.append('--json')  # 结构化输出，无需按冒号拆分
 
         if ignore_case:
             cmd.append('-i')  # 忽略大小写
 
+        if max_count is not None:
+            cmd.extend(['-m', str(max_count)])  # 每个文件匹配够即停止读取该文件
+
         if file_glob:
             cmd.append(f'--glob={file_glob}')  # 文件过滤
 
-        cmd.append(pattern)
+        self._append_patterns(cmd, pattern)
         cmd.append(path)
 
         return cmd
 
+    @staticmethod
+    def _append_patterns(cmd: list, pattern: Union[str, List[str]]):
+        """追加搜索模式（多个模式逐个使用 -e 参数）"""
+        if isinstance(pattern, str):
+            cmd.append(pattern)
+        else:
+            for p in pattern:
+                cmd.extend(['-e', p])
+
 
 # 全局配置实例
 _global_config: Optional[SearchConfig] = None
@@ -8,6 +8,13 @@ from typing import Optional, List, Tuple
 from pathlib import Path
 from .grep_searcher import GrepSearcher
 
+# 签名清理用的注释模式（单行注释 / 多行注释）
+_COMMENT_LINE_RE = re.compile(r'//.*')
+_COMMENT_BLOCK_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+# 函数名前缀以这些关键字/符号结尾时，视为调用而非声明
+_CALL_PREFIX_RE = re.compile(r'(?:if|while|for|return|=|,|\(|&&|\|\|)\Z')
+
 
 class SignatureSearcher:
     """函数签名搜索器"""
@@ -68,32 +75,14 @@ class SignatureSearcher:
         Returns:
             True 表示可能是声明
         """
-        line = line.strip()
-
-        # 排除：明显是调用的情况
-        exclude_keywords = ['if', 'while', 'for', 'return', '=', ',', '(', '&&', '||']
-
         # 找到函数名位置
         idx = line.find(func_name)
         if idx == -1:
             return False
 
-        # 检查前面的内容
+        # 检查前面的内容：以 if/while/return/= 等结尾，很可能是调用
         prefix = line[:idx].strip()
-
-        # 如果前面是排除关键字结尾，很可能是调用
-        for keyword in exclude_keywords:
-            if prefix.endswith(keyword):
-                return False
-
-        # 简单启发：如果前面有类型关键字，可能是声明
-        type_keywords = ['void', 'int', 'char', 'bool', 'static', 'inline',
-                        'const', 'unsigned', 'VOS_', 'DIAM_']
-        for keyword in type_keywords:
-            if keyword in prefix:
-                return True
-
-        return True
+        return _CALL_PREFIX_RE.search(prefix) is None
 
     def _extract_signature(self, file_path: Path, start_line: int) -> Optional[str]:
         """
@@ -107,16 +96,15 @@ class SignatureSearcher:
             完整签名，失败返回 None
         """
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-
-            # 从匹配行开始提取
-            start_idx = start_line - 1
+            # 从匹配行开始提取，最多读取 5 行（函数签名一般不会太长）
+            window = self.grep.read_line_window(file_path, start_line - 1, 0, 5)
+            if window is None:
+                return None
+            lines, _ = window
             signature_lines = []
 
-            # 最多读取 5 行（函数签名一般不会太长）
-            for i in range(start_idx, min(start_idx + 5, len(lines))):
-                line = lines[i].rstrip()
+            for line in lines:
+                line = line.rstrip()
                 signature_lines.append(line)
 
                 # 如果遇到 ; 或 {，签名结束
@@ -143,10 +131,10 @@ class SignatureSearcher:
             清理后的签名
         """
         # 移除单行注释
-        signature = re.sub(r'//.*', '', signature)
+        signature = _COMMENT_LINE_RE.sub('', signature)
 
         # 移除多行注释
-        signature = re.sub(r'/\*.*?\*/', '', signature, flags=re.DOTALL)
+        signature = _COMMENT_BLOCK_RE.sub('', signature)
 
         return signature.strip()
 
@@ -4,9 +4,15 @@
 用于查找 struct、class、typedef、using 等数据结构定义
 """
 import re
-from typing import Optional
+from typing import Dict, List, Optional
 from .grep_searcher import GrepSearcher
 
+# _find_struct_start_backward 最多向上查看 100 行，再向上 5 行查找 typedef/struct
+_STRUCT_LOOKBACK_LINES = 105
+
+# 按名称缓存的优先级搜索模式 {结构体名称: [(优先级, [模式列表]), ...]}
+_PRIORITIZED_PATTERN_CACHE: Dict[str, list] = {}
+
 
 class StructureSearcher:
     """数据结构定义搜索器"""
@@ -43,22 +49,84 @@ class StructureSearcher:
                 max_results=10  # 获取前10个候选
             )
 
-            if not matches:
-                continue
+            result = self._definition_from_matches(matches, struct_name)
+            if result:
+                return result
+
+        return None
+
+    def search_many(self, struct_names: List[str]) -> Dict[str, Optional[str]]:
+        """
+        批量搜索多个数据结构定义
+
+        结果与逐个调用 search() 一致：每个优先级只执行一次批量 grep
+        （所有待查名称的模式一起搜索），未找到的名称进入下一优先级。
+
+        Args:
+            struct_names: 结构体名称列表
 
-            # 筛选最可能是真实定义的匹配项
-            best_match = self._select_best_definition(matches, struct_name)
-            if best_match:
-                file_path, line_num, content = best_match
+        Returns:
+            {结构体名称: 完整定义或 None}
+        """
+        results: Dict[str, Optional[str]] = dict.fromkeys(struct_names)
+        pending = list(results)
+        pattern_groups = {name: self._build_prioritized_patterns(name) for name in pending}
+
+        level = 0
+        while pending:
+            # 本优先级各名称的组合模式
+            combined_by_name = {}
+            for name in pending:
+                groups = pattern_groups[name]
+                if level < len(groups):
+                    combined_by_name[name] = '|'.join(groups[level][1])
+            if not combined_by_name:
+                break
+
+            batch = self.grep.search_content_batch(
+                patterns=list(combined_by_name.values()),
+                file_glob='*.h',
+                max_results_per_pattern=10  # 与 search() 相同，每个名称取前10个候选
+            )
 
-                # 提取完整定义
-                result = self._extract_definition_from_file(
-                    file_path, line_num, content, struct_name
-                )
+            not_found = []
+            for name, combined in combined_by_name.items():
+                result = self._definition_from_matches(batch.get(combined), name)
                 if result:
-                    return result
+                    results[name] = result
+                else:
+                    not_found.append(name)
 
-        return None
+            pending = not_found
+            level += 1
+
+        return results
+
+    def _definition_from_matches(self, matches: Optional[list], struct_name: str) -> Optional[str]:
+        """
+        从一组匹配项中选出真实定义并提取完整定义文本
+
+        Args:
+            matches: [(文件路径, 行号, 内容), ...] 列表
+            struct_name: 结构体名称
+
+        Returns:
+            完整定义文本，无合适匹配返回 None
+        """
+        if not matches:
+            return None
+
+        # 筛选最可能是真实定义的匹配项
+        best_match = self._select_best_definition(matches, struct_name)
+        if not best_match:
+            return None
+
+        file_path, line_num, content = best_match
+
+        # 提取完整定义
+        return self._extract_definition_from_file(
+            file_path, line_num, content, struct_name
+        )
 
     def _build_prioritized_patterns(self, struct_name: str) -> list:
         """
@@ -74,11 +142,15 @@ class StructureSearcher:
             struct_name: 结构体名称
 
         Returns:
-            [(优先级, [模式列表]), ...] 列表
+            [(优先级, [模式列表]), ...] 列表（按名称缓存，调用方不应修改）
         """
+        cached = _PRIORITIZED_PATTERN_CACHE.get(struct_name)
+        if cached is not None:
+            return cached
+
         name = re.escape(struct_name)
 
-        return [
+        groups = [
             # 优先级1: 最精确 - typedef struct _Name 或 struct Name {
             (1, [
                 # 支持常见前缀: _ __ tag_ s_ st_ 或无前缀，确保精确匹配
@@ -98,6 +170,8 @@ class StructureSearcher:
                 rf'using\s+{name}\s*=',  # using Name = ...
             ]),
         ]
+        _PRIORITIZED_PATTERN_CACHE[struct_name] = groups
+        return groups
 
     def _select_best_definition(self, matches: list, struct_name: str) -> Optional[tuple]:
         """
@@ -119,6 +193,9 @@ class StructureSearcher:
         if not matches:
             return None
 
+        # 规则1 使用的变量声明模式，每次选择只构造一次
+        var_decl_re = re.compile(rf'^\s*{struct_name}\s+[\*&]?\w+\s*[;,]')
+
         scored_matches = []
         for file_path, line_num, content in matches:
             score = 0
@@ -126,7 +203,7 @@ class StructureSearcher:
 
             # 规则1: 排除明显是变量声明的行
             # 如果行是 "Type *varname;" 或 "Type varname;" 的形式，且不包含 typedef/struct/class
-            if re.match(rf'^\s*{struct_name}\s+[\*&]?\w+\s*[;,]', content_stripped):
+            if var_decl_re.match(content_stripped):
                 if 'typedef' not in content_stripped and 'struct' not in content_stripped and 'class' not in content_stripped:
                     continue  # 跳过这种变量声明
 
@@ -179,12 +256,16 @@ class StructureSearcher:
             完整定义文本或 None
         """
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-
             match_idx = line_num - 1
             max_lines = 60
 
+            # 只读取匹配行附近的窗口，以下索引均相对于窗口
+            window = self.grep.read_line_window(file_path, match_idx, _STRUCT_LOOKBACK_LINES, max_lines)
+            if window is None:
+                return None
+            lines, base_idx = window
+            match_idx -= base_idx
+
             # 情况1: 匹配行以 } 开头（typedef 结尾形式）
             if content.strip().startswith('}'):
                 start_idx = self._find_struct_start_backward(lines, match_idx)
@@ -196,7 +277,7 @@ class StructureSearcher:
                     definition_lines.append(lines[i].rstrip())
 
                 definition = '\n'.join(definition_lines)
-                return f"// 来自: {file_path.resolve()}:{start_idx + 1}\n{definition}"
+                return f"// 来自: {file_path.resolve()}:{base_idx + start_idx + 1}\n{definition}"
 
             # 情况2: 匹配行包含 typedef struct 或 struct Name {
             else:
@@ -209,13 +290,15 @@ class StructureSearcher:
                     line = lines[i]
                     definition_lines.append(line.rstrip())
 
-                    # 计算花括号
-                    brace_count += line.count('{') - line.count('}')
-                    if '{' in line:
+                    # 计算花括号（每行只各统计一次）
+                    opens = line.count('{')
+                    closes = line.count('}')
+                    brace_count += opens - closes
+                    if opens:
                         found_brace = True
 
                     # 如果找到了开始的 { 且括号匹配完成
-                    if found_brace and brace_count == 0 and '}' in line:
+                    if found_brace and brace_count == 0 and closes:
                         break
 
                     # 或者遇到分号（单行 typedef）
@@ -228,7 +311,7 @@ class StructureSearcher:
                         break
 
                 definition = '\n'.join(definition_lines)
-                return f"// 来自: {file_path.resolve()}:{start_idx + 1}\n{definition}"
+                return f"// 来自: {file_path.resolve()}:{base_idx + start_idx + 1}\n{definition}"
 
         except Exception as e:
             return None
@@ -250,18 +333,18 @@ class StructureSearcher:
         for i in range(end_idx, max(0, end_idx - 100), -1):
             line = lines[i]
 
-            if not found_close_brace and '}' in line:
+            # 反向计算括号（每行只各统计一次）
+            opens = line.count('{')
+            closes = line.count('}')
+            if closes:
                 found_close_brace = True
-
-            # 反向计算括号
-            brace_count += line.count('}') - line.count('{')
+            brace_count += closes - opens
 
             # 如果找到匹配的 { 且括号平衡
-            if found_close_brace and brace_count == 0 and '{' in line:
+            if found_close_brace and brace_count == 0 and opens:
                 # 继续向上查找 typedef struct 或 struct
                 for j in range(i, max(0, i - 5), -1):
-                    test_line = lines[j].strip()
-                    if test_line.startswith('typedef') or test_line.startswith('struct') or test_line.startswith('class'):
+                    if lines[j].lstrip().startswith(('typedef', 'struct', 'class')):
                         return j
                 return i
 
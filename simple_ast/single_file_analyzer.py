@@ -15,6 +15,42 @@ from .logger import get_logger
 
 logger = get_logger()
 
+# 标准库函数（调用分析时过滤）
+_STD_FUNCTIONS = frozenset({
+    'printf', 'scanf', 'sprintf', 'fprintf', 'snprintf',
+    'malloc', 'free', 'calloc', 'realloc',
+    'memcpy', 'memset', 'memmove', 'memcmp',
+    'strlen', 'strcpy', 'strcat', 'strcmp', 'strncpy', 'strncmp',
+    'fopen', 'fclose', 'fread', 'fwrite', 'fseek', 'ftell',
+    'exit', 'abort', 'assert',
+    'sqrt', 'pow', 'sin', 'cos', 'exp', 'log',
+})
+
+# 标准库类型（数据结构使用分析时过滤）
+_STD_TYPES = frozenset({
+    'string', 'vector', 'list', 'map', 'set', 'unordered_map', 'unordered_set',
+    'queue', 'stack', 'deque', 'priority_queue',
+    'shared_ptr', 'unique_ptr', 'weak_ptr',
+    'mutex', 'thread', 'atomic',
+    'ifstream', 'ofstream', 'fstream', 'stringstream',
+    'int8_t', 'int16_t', 'int32_t', 'int64_t',
+    'uint8_t', 'uint16_t', 'uint32_t', 'uint64_t',
+    'size_t', 'ptrdiff_t',
+})
+
+# 数据结构节点类型 -> 数据结构类别
+_STRUCTURE_NODE_TYPES = {
+    'struct_specifier': 'struct',
+    'class_specifier': 'class',
+    'enum_specifier': 'enum',
+    'type_definition': 'typedef'
+}
+
+# analyze_file 一次遍历收集的节点类型
+_COLLECTED_NODE_TYPES = (
+    'function_definition', 'call_expression', 'type_identifier',
+) + tuple(_STRUCTURE_NODE_TYPES)
+
 
 @dataclass
 class FileBoundary:
@@ -91,26 +127,27 @@ class SingleFileAnalyzer:
         if not tree:
             raise ValueError(f"Failed to parse file: {target_path}")
 
-        root_node = tree.root_node
+        # 一次遍历语法树，按类型收集后续各步骤需要的节点
+        nodes_by_type = CppParser.find_nodes_by_types(tree.root_node, _COLLECTED_NODE_TYPES)
 
         # 步骤1: 索引文件内的所有函数定义
         print("  Step 1: Indexing functions in file...")
-        self._index_file_functions(root_node, source_code)
+        self._index_file_functions(nodes_by_type, source_code)
         print(f"    Found {len(self.file_functions)} functions")
 
         # 步骤2: 索引文件内的所有数据结构定义
         print("  Step 2: Indexing data structures in file...")
-        self._index_file_data_structures(root_node, source_code)
+        self._index_file_data_structures(nodes_by_type, source_code)
         print(f"    Found {len(self.file_data_structures)} data structures")
 
         # 步骤3: 分析函数调用，区分内部/外部
         print("  Step 3: Analyzing function calls...")
-        self._analyze_function_calls(root_node, source_code)
+        self._analyze_function_calls(nodes_by_type, source_code)
         print(f"    Internal: {len(self.internal_functions)}, External: {len(self.external_functions)}")
 
         # 步骤4: 分析数据结构使用，区分内部/外部
         print("  Step 4: Analyzing data structure usage...")
-        self._analyze_data_structure_usage(root_node, source_code)
+        self._analyze_data_structure_usage(nodes_by_type, source_code)
         print(f"    Internal: {len(self.internal_data_structures)}, External: {len(self.external_data_structures)}")
 
         # 构建边界信息
@@ -132,24 +169,23 @@ class SingleFileAnalyzer:
         """读取文件内容，尝试多种编码"""
         encodings_to_try = ['utf-8', 'gbk', 'gb2312', 'latin-1', 'cp1252']
 
+        # 只读取一次，在内存中测试编码
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+
         for encoding in encodings_to_try:
             try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    f.read()  # 测试编码
-                # 成功后读取为 bytes
-                with open(file_path, 'rb') as f:
-                    return f.read()
+                raw.decode(encoding)
+                return raw
             except (UnicodeDecodeError, UnicodeError):
                 continue
 
         return None
 
-    def _index_file_functions(self, root_node, source_code: bytes):
+    def _index_file_functions(self, nodes_by_type: Dict[str, list], source_code: bytes):
         """索引文件中定义的所有函数"""
-        func_defs = CppParser.find_nodes_by_type(root_node, 'function_definition')
-
-        for func_node in func_defs:
-            func_name = CppParser.get_function_name(func_node, source_code)
+        for func_node in nodes_by_type['function_definition']:
+            func_name = sys.intern(CppParser.get_function_name(func_node, source_code))
             if not func_name:
                 continue
 
@@ -179,19 +215,10 @@ class SingleFileAnalyzer:
                     return True
         return False
 
-    def _index_file_data_structures(self, root_node, source_code: bytes):
+    def _index_file_data_structures(self, nodes_by_type: Dict[str, list], source_code: bytes):
         """索引文件中定义的所有数据结构"""
-        structure_types = {
-            'struct_specifier': 'struct',
-            'class_specifier': 'class',
-            'enum_specifier': 'enum',
-            'type_definition': 'typedef'
-        }
-
-        for node_type, struct_type in structure_types.items():
-            nodes = CppParser.find_nodes_by_type(root_node, node_type)
-
-            for node in nodes:
+        for node_type, struct_type in _STRUCTURE_NODE_TYPES.items():
+            for node in nodes_by_type[node_type]:
                 # 查找名称
                 name_node = CppParser.find_child_by_type(node, 'type_identifier')
                 if not name_node:
@@ -200,7 +227,7 @@ class SingleFileAnalyzer:
                 if not name_node:
                     continue
 
-                struct_name = CppParser.get_node_text(name_node, source_code)
+                struct_name = sys.intern(CppParser.get_node_text(name_node, source_code))
                 line_number = node.start_point[0] + 1
 
                 # 获取定义（限制长度）
@@ -218,24 +245,20 @@ class SingleFileAnalyzer:
                 # 标记为内部数据结构
                 self.internal_data_structures.add(struct_name)
 
-    def _analyze_function_calls(self, root_node, source_code: bytes):
+    def _analyze_function_calls(self, nodes_by_type: Dict[str, list], source_code: bytes):
         """分析函数调用，区分内部和外部"""
-        call_expressions = CppParser.find_nodes_by_type(root_node, 'call_expression')
-
-        for call_node in call_expressions:
-            # 获取被调用的函数名
+        # 获取被调用的函数名：先按字节切片去重，每个不同的调用表达式只解码一次
+        raw_callees = set()
+        for call_node in nodes_by_type['call_expression']:
             func_node = call_node.child_by_field_name('function')
-            if not func_node:
-                continue
+            if func_node:
+                raw_callees.add(source_code[func_node.start_byte:func_node.end_byte])
 
-            called_func = CppParser.get_node_text(func_node, source_code)
+        for raw_callee in raw_callees:
+            called_func = CppParser.decode_text(raw_callee)
 
-            # 处理成员函数调用（obj.method() 或 obj->method()）
-            if '.' in called_func or '->' in called_func:
-                # 提取方法名
-                parts = called_func.replace('->', '.').split('.')
-                if len(parts) >= 2:
-                    called_func = parts[-1]
+            # 处理成员函数调用（obj.method() 或 obj->method()）：取最后一个 . 或 -> 之后的方法名
+            called_func = sys.intern(called_func.rpartition('->')[2].rpartition('.')[2])
 
             # 过滤掉明显的标准库函数
             if self._is_standard_library_function(called_func):
@@ -249,13 +272,17 @@ class SingleFileAnalyzer:
                 # 外部函数
                 self.external_functions.add(called_func)
 
-    def _analyze_data_structure_usage(self, root_node, source_code: bytes):
+    def _analyze_data_structure_usage(self, nodes_by_type: Dict[str, list], source_code: bytes):
         """分析数据结构使用，区分内部和外部"""
-        # 1. 查找所有类型标识符（包括变量声明、参数等）
-        type_identifiers = CppParser.find_nodes_by_type(root_node, 'type_identifier')
+        # 查找所有类型标识符（包括变量声明、参数、类型转换 (Type *)expr 中的类型等）
+        # 先按字节切片去重，每个不同的类型名只解码一次
+        raw_names = {
+            source_code[type_node.start_byte:type_node.end_byte]
+            for type_node in nodes_by_type['type_identifier']
+        }
 
-        for type_node in type_identifiers:
-            type_name = CppParser.get_node_text(type_node, source_code)
+        for raw_name in raw_names:
+            type_name = sys.intern(CppParser.decode_text(raw_name))
 
             # 过滤标准库类型
             if self._is_standard_library_type(type_name):
@@ -269,54 +296,13 @@ class SingleFileAnalyzer:
                 # 外部数据结构
                 self.external_data_structures.add(type_name)
 
-        # 2. 查找类型转换中的类型：(Type *)expr
-        cast_expressions = CppParser.find_nodes_by_type(root_node, 'cast_expression')
-
-        for cast_node in cast_expressions:
-            # 提取类型描述符节点
-            type_desc = cast_node.child_by_field_name('type')
-            if type_desc:
-                # 查找 type_identifier
-                type_ids = CppParser.find_nodes_by_type(type_desc, 'type_identifier')
-                for type_node in type_ids:
-                    type_name = CppParser.get_node_text(type_node, source_code)
-
-                    # 过滤标准库类型
-                    if self._is_standard_library_type(type_name):
-                        continue
-
-                    # 判断是内部还是外部
-                    if type_name in self.file_data_structures:
-                        pass
-                    else:
-                        self.external_data_structures.add(type_name)
-
     def _is_standard_library_function(self, func_name: str) -> bool:
         """判断是否是标准库函数"""
-        std_functions = {
-            'printf', 'scanf', 'sprintf', 'fprintf', 'snprintf',
-            'malloc', 'free', 'calloc', 'realloc',
-            'memcpy', 'memset', 'memmove', 'memcmp',
-            'strlen', 'strcpy', 'strcat', 'strcmp', 'strncpy', 'strncmp',
-            'fopen', 'fclose', 'fread', 'fwrite', 'fseek', 'ftell',
-            'exit', 'abort', 'assert',
-            'sqrt', 'pow', 'sin', 'cos', 'exp', 'log',
-        }
-        return func_name in std_functions
+        return func_name in _STD_FUNCTIONS
 
     def _is_standard_library_type(self, type_name: str) -> bool:
         """判断是否是标准库类型"""
-        std_types = {
-            'string', 'vector', 'list', 'map', 'set', 'unordered_map', 'unordered_set',
-            'queue', 'stack', 'deque', 'priority_queue',
-            'shared_ptr', 'unique_ptr', 'weak_ptr',
-            'mutex', 'thread', 'atomic',
-            'ifstream', 'ofstream', 'fstream', 'stringstream',
-            'int8_t', 'int16_t', 'int32_t', 'int64_t',
-            'uint8_t', 'uint16_t', 'uint32_t', 'uint64_t',
-            'size_t', 'ptrdiff_t',
-        }
-        return type_name in std_types
+        return type_name in _STD_TYPES
 
     def get_entry_points(self, source_code: bytes, file_path: str) -> List[EntryPointInfo]:
         """
@@ -362,7 +348,7 @@ class SingleFileAnalyzer:
     def _find_header_declarations(self, cpp_file_path: str) -> dict:
         """
         查找cpp文件对应的头文件中的函数声明
-        使用简单的文本搜索，不需要AST解析
+        使用简单的文本搜索，不需要AST解析（与 FunctionReporter 共用 CppParser.find_declared_functions）
 
         Returns:
             dict: {函数名: 头文件路径}
@@ -389,30 +375,16 @@ class SingleFileAnalyzer:
                     with open(header_path, 'r', encoding='utf-8', errors='ignore') as f:
                         header_content = f.read()
 
-                    # 对每个文件中的函数名，在头文件中搜索
-                    for func_name in self.file_functions.keys():
-                        # 简单搜索：函数名出现在头文件中
-                        # 排除注释中的出现（简单检查：不在 // 或 /* */ 之后）
-                        if func_name in header_content:
-                            # 更精确的检查：确保是函数声明，不是注释或其他上下文
-                            # 查找包含函数名的行
-                            for line in header_content.split('\n'):
-                                # 跳过注释行
-                                if line.strip().startswith('//') or line.strip().startswith('/*'):
-                                    continue
-
-                                # 检查是否包含函数名，并且看起来像函数声明
-                                # 函数声明通常是：返回类型 函数名(参数);
-                                if func_name in line and '(' in line:
-                                    header_funcs[func_name] = str(header_path)
-                                    logger.info(f"[头文件分析] 发现 {func_name} 在 {header_path}")
-                                    break
-
-                    logger.info(f"[头文件分析] 在 {header_path} 中找到 {len(header_funcs)} 个函数声明")
+                    # 去掉注释后一次扫描所有函数名（函数名后紧跟 '('，按标识符边界匹配）
+                    for func_name in CppParser.find_declared_functions(header_content, self.file_functions):
+                        header_funcs[func_name] = str(header_path)
+                        logger.info("[头文件分析] 发现 %s 在 %s", func_name, header_path)
+
+                    logger.info("[头文件分析] 在 %s 中找到 %d 个函数声明", header_path, len(header_funcs))
                     break  # 找到一个头文件就够了
 
                 except Exception as e:
-                    logger.debug(f"[头文件分析] 读取 {header_path} 失败: {e}")
+                    logger.debug("[头文件分析] 读取 %s 失败: %s", header_path, e)
                     continue
 
         return header_funcs
@@ -475,9 +447,41 @@ class SingleFileAnalyzer:
         if func_name in visited:
             return current_node
 
+        # 函数体中的所有调用 [(被调函数名, 调用行号), ...]，每个函数只遍历一次
+        calls = func_info.get('calls')
+        if calls is None:
+            calls = self._collect_function_calls(func_node, source_code)
+            func_info['calls'] = calls
+
+        # visited 只记录当前调用路径：进入时加入，返回时移除（无需为每个子调用复制）
         visited.add(func_name)
+        try:
+            for called_name, called_from_line in calls:
+                # 递归追踪
+                child_node = self._trace_function_calls_recursive(
+                    called_name,
+                    source_code,
+                    visited,
+                    depth + 1,
+                    max_depth
+                )
+
+                if child_node:
+                    child_node.called_from_line = called_from_line
+                    current_node.children.append(child_node)
+        finally:
+            visited.discard(func_name)
 
-        # 查找函数体中的所有调用
+        return current_node
+
+    def _collect_function_calls(self, func_node, source_code: bytes) -> list:
+        """
+        收集函数体中的调用（已过滤标准库函数）
+
+        Returns:
+            [(被调函数名, 调用行号), ...]
+        """
+        calls = []
         call_expressions = CppParser.find_nodes_by_type(func_node, 'call_expression')
 
         for call_expr in call_expressions:
@@ -487,30 +491,16 @@ class SingleFileAnalyzer:
 
             called_name = CppParser.get_node_text(func_expr, source_code)
 
-            # 处理成员函数调用
-            if '.' in called_name or '->' in called_name:
-                parts = called_name.replace('->', '.').split('.')
-                if len(parts) >= 2:
-                    called_name = parts[-1]
+            # 处理成员函数调用：取最后一个 . 或 -> 之后的方法名
+            called_name = sys.intern(called_name.rpartition('->')[2].rpartition('.')[2])
 
             # 过滤标准库函数
             if self._is_standard_library_function(called_name):
                 continue
 
-            # 递归追踪
-            child_node = self._trace_function_calls_recursive(
-                called_name,
-                source_code,
-                visited.copy(),
-                depth + 1,
-                max_depth
-            )
-
-            if child_node:
-                child_node.called_from_line = call_expr.start_point[0] + 1
-                current_node.children.append(child_node)
+            calls.append((called_name, call_expr.start_point[0] + 1))
 
-        return current_node
+        return calls
 
     def get_data_structures_info(self) -> Dict[str, DataStructureInfo]:
         """获取数据结构信息（用于兼容原有接口）"""
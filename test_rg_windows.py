@@ -1,16 +1,19 @@
 """测试 Windows 下直接调用 rg"""
 import subprocess
 
-print("测试方式1: 使用 shell=True 的字符串命令")
+direct_ok = False
+
+print("测试方式1: 直接以参数列表调用（不经过 cmd.exe）")
 try:
     result = subprocess.run(
-        'rg --version',
+        ['rg', '--version'],
         capture_output=True,
         timeout=5,
-        shell=True
+        creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)  # Windows 下不分配控制台窗口
     )
     print(f"Return code: {result.returncode}")
     if result.returncode == 0:
+        direct_ok = True
         print("成功! 输出:")
         print(result.stdout.decode('utf-8', errors='ignore'))
     else:
@@ -19,20 +22,22 @@ try:
 except Exception as e:
     print(f"异常: {e}")
 
-print("\n" + "=" * 60)
-print("测试方式2: 尝试 PowerShell")
-try:
-    result = subprocess.run(
-        ['powershell', '-Command', 'rg --version'],
-        capture_output=True,
-        timeout=5
-    )
-    print(f"Return code: {result.returncode}")
-    if result.returncode == 0:
-        print("成功! 输出:")
-        print(result.stdout.decode('utf-8', errors='ignore'))
-    else:
-        print("失败! 错误:")
-        print(result.stderr.decode('utf-8', errors='ignore'))
-except Exception as e:
-    print(f"异常: {e}")
+if not direct_ok:
+    # 直接调用失败时才尝试 PowerShell（多启动一层进程）
+    print("\n" + "=" * 60)
+    print("测试方式2: 尝试 PowerShell")
+    try:
+        result = subprocess.run(
+            ['powershell', '-Command', 'rg --version'],
+            capture_output=True,
+            timeout=5
+        )
+        print(f"Return code: {result.returncode}")
+        if result.returncode == 0:
+            print("成功! 输出:")
+            print(result.stdout.decode('utf-8', errors='ignore'))
+        else:
+            print("失败! 错误:")
+            print(result.stderr.decode('utf-8', errors='ignore'))
+    except Exception as e:
+        print(f"异常: {e}")
@@ -19,17 +19,20 @@ patterns = {
     "typedef\\s+struct\\s*\\{": "tFeAppMsg - 优先级1模式2 (匿名struct)",
 }
 
+# 所有模式一次 rg 调用（-e 逐个传入），结果按模式分组
+results = searcher.search_content_batch(
+    patterns=list(patterns),
+    file_glob='*.h',
+    max_results_per_pattern=5
+)
+
 for pattern, desc in patterns.items():
     print(f"{'='*60}")
     print(f"测试: {desc}")
     print(f"模式: {pattern}")
     print()
 
-    matches = searcher.search_content(
-        pattern=pattern,
-        file_glob='*.h',
-        max_results=5
-    )
+    matches = results.get(pattern)
 
     if matches:
         print(f"找到 {len(matches)} 个匹配:")
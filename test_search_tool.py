@@ -6,25 +6,28 @@ print("=" * 60)
 print("1. 直接测试命令可用性")
 print("=" * 60)
 
-# 测试 rg 命令
-try:
-    result = subprocess.run(['rg', '--version'], capture_output=True, timeout=5)
-    print(f"rg 可用: returncode={result.returncode}")
-    print(f"输出: {result.stdout.decode('utf-8', errors='ignore')[:100]}")
-except Exception as e:
-    print(f"rg 不可用: {e}")
-
-print()
+# 同时启动 rg / grep 探测进程，再依次收集输出（总耗时取较慢的一个）
+probes = {}
+for tool in ('rg', 'grep'):
+    try:
+        probes[tool] = subprocess.Popen([tool, '--version'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except Exception as e:
+        probes[tool] = e
+
+for tool, proc in probes.items():
+    if isinstance(proc, Exception):
+        print(f"{tool} 不可用: {proc}")
+    else:
+        try:
+            stdout, _ = proc.communicate(timeout=5)
+            print(f"{tool} 可用: returncode={proc.returncode}")
+            print(f"输出: {stdout.decode('utf-8', errors='ignore')[:100]}")
+        except Exception as e:
+            proc.kill()
+            proc.communicate()
+            print(f"{tool} 不可用: {e}")
+    print()
 
-# 测试 grep 命令
-try:
-    result = subprocess.run(['grep', '--version'], capture_output=True, timeout=5)
-    print(f"grep 可用: returncode={result.returncode}")
-    print(f"输出: {result.stdout.decode('utf-8', errors='ignore')[:100]}")
-except Exception as e:
-    print(f"grep 不可用: {e}")
-
-print()
 print("=" * 60)
 print("2. 测试自动检测（AUTO模式）")
 print("=" * 60)
@@ -7,12 +7,15 @@ searcher = StructureSearcher(project_root)
 # 测试三个结构体
 test_structures = ["MsgBlock", "DiamAppMsg", "tFeAppMsg"]
 
+# 批量搜索：每个优先级对所有名称只执行一次 grep
+results = searcher.search_many(test_structures)
+
 for struct_name in test_structures:
     print(f"\n{'='*60}")
     print(f"搜索: {struct_name}")
     print('='*60)
 
-    result = searcher.search(struct_name)
+    result = results[struct_name]
     if result:
         print(f"[SUCCESS] 找到定义:")
         print(result)
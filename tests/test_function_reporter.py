@@ -0,0 +1,75 @@
+"""
+FunctionReporter 测试：报告输出格式
+"""
+import io
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from simple_ast import CppProjectAnalyzer, get_mode_from_string
+from simple_ast.reporters.function_reporter import FunctionReporter, _LineJoinWriter
+
+TESTS_DIR = Path(__file__).resolve().parent
+
+
+def test_line_join_writer():
+    """逐行写入的结果与 "\\n".join(lines) 一致（末尾无换行）"""
+    lines = ["=" * 80, "[函数实现] Foo", "=" * 80, "int Foo() { return 0; }", "", "[常量定义]", "A: 1"]
+    buf = io.StringIO()
+    writer = _LineJoinWriter(buf)
+    writer.write(f"{lines[0]}\n{lines[1]}\n{lines[2]}\n")
+    for line in lines[3:]:
+        writer.write(f"{line}\n")
+    assert buf.getvalue() == "\n".join(lines)
+
+
+def _check_report(result, func_name):
+    """generate() 返回值与写入外部流的内容一致，且末尾无多余换行"""
+    report = result.generate_single_function_report(func_name)
+    out = io.StringIO()
+    assert result.generate_single_function_report(func_name, out) is None
+    assert out.getvalue() == report
+
+    assert not report.endswith("\n"), "报告末尾不应有多余换行"
+    return report
+
+
+def test_generate_matches_join():
+    """generate() 返回值与写入外部流的内容一致，且与行列表拼接格式相同"""
+    analyzer = CppProjectAnalyzer(str(TESTS_DIR), mode=get_mode_from_string("single"))
+    result = analyzer.analyze_file(str(TESTS_DIR / "test_switch.cpp"))
+    _check_report(result, sorted(result.file_boundary.internal_functions)[0])
+
+    # 含类型转换章节的报告
+    analyzer = CppProjectAnalyzer(str(TESTS_DIR), mode=get_mode_from_string("single"))
+    result = analyzer.analyze_file(str(TESTS_DIR / "test_msgblock.cpp"))
+    report = _check_report(result, "PidDiamMsgProc")
+    assert "[类型转换关系]" in report
+
+
+def test_find_header_declarations():
+    """注释替换为空格、字符串字面量中的 // 不当作注释"""
+    header = (
+        "int/*ret*/Foo(void);\n"
+        "static const char *u = \"http://x\"; void Bar(int);\n"
+        "// void Baz(int);\n"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        cpp_path = Path(tmp) / "sample.cpp"
+        cpp_path.write_text("", encoding="utf-8")
+        cpp_path.with_suffix(".h").write_text(header, encoding="utf-8")
+
+        reporter = SimpleNamespace(_file_functions={"Foo": {}, "Bar": {}, "Baz": {}})
+        found = FunctionReporter._find_header_declarations(reporter, str(cpp_path))
+
+    assert set(found) == {"Foo", "Bar"}, found
+
+
+if __name__ == "__main__":
+    test_line_join_writer()
+    test_find_header_declarations()
+    test_generate_matches_join()
+    print("All tests passed!")
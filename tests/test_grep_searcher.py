@@ -0,0 +1,31 @@
+"""
+GrepSearcher 测试：批量搜索
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from simple_ast.searchers import GrepSearcher
+
+
+def test_search_content_batch_skips_invalid_pattern():
+    """无效模式被忽略，其余模式的结果正常返回"""
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "sample.h").write_text(
+            "typedef struct {\n    int a;\n} MsgBlock;\nvoid DiamProc(int);\n",
+            encoding="utf-8"
+        )
+        searcher = GrepSearcher(tmp)
+        valid = ["typedef\\s+struct", "MsgBlock", "DiamProc"]
+        results = searcher.search_content_batch(valid[:1] + ["(unclosed"] + valid[1:])
+
+    for pattern in valid:
+        assert len(results.get(pattern, [])) == 1, (pattern, results)
+    assert not results.get("(unclosed")
+
+
+if __name__ == "__main__":
+    test_search_content_batch_skips_invalid_pattern()
+    print("All tests passed!")
@@ -0,0 +1,36 @@
+"""
+SingleFileAnalyzer 测试：头文件声明检测
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from simple_ast.single_file_analyzer import SingleFileAnalyzer
+
+
+def test_find_header_declarations():
+    """注释替换为空格、字符串字面量中的 // 不当作注释、函数名按标识符边界匹配"""
+    header = (
+        "int/*ret*/Foo(void);\n"
+        "static const char *u = \"http://x\"; void Bar(int);\n"
+        "// void Baz(int);\n"
+        "void BooBar(int);\n"
+        "void pQux(int);\n"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        cpp_path = Path(tmp) / "sample.cpp"
+        cpp_path.write_text("", encoding="utf-8")
+        cpp_path.with_suffix(".h").write_text(header, encoding="utf-8")
+
+        analyzer = SingleFileAnalyzer(tmp)
+        analyzer.file_functions = {"Foo": {}, "Bar": {}, "Baz": {}, "Boo": {}, "Qux": {}}
+        found = analyzer._find_header_declarations(str(cpp_path))
+
+    assert set(found) == {"Foo", "Bar"}, found
+
+
+if __name__ == "__main__":
+    test_find_header_declarations()
+    print("All tests passed!")